@@ -0,0 +1,2 @@
+def pkg_help():
+    print("App: Multi-threaded zip archive creation and extraction.")
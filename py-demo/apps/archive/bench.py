@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, List
+
+from policy import METHODS, POLICIES, FixedPolicy, Policy, new_policy
+from zip_writer import create_zip
+
+# 压缩策略的 benchmark: 生成几类合成数据, 对每个策略创建归档, 输出吞吐 (MB/s) 和压缩比.
+# - text: 日志文本, 高可压缩
+# - media: 随机数据 (.bin 以及 .jpg 扩展名), 不可压缩
+# - pdf: 文本头加已 deflate 的内容流, 类似 PDF, 整体几乎不可压缩
+# - mixed: 以上各类加上 JSON 记录和大量小文件
+
+DEFAULT_POLICIES = "store,deflate-9,deflate-6,adaptive,max"
+
+
+def _words(rng: random.Random, count: int = 4000) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(2, 10))) for _ in range(count)]
+
+
+def _write_text(path: str, size: int, rng: random.Random, words: List[str]):
+    levels = ("INFO", "INFO", "INFO", "WARN", "ERROR", "DEBUG")
+    with open(path, mode="w", encoding="utf-8") as f:
+        written = 0
+        while written < size:
+            line = (
+                f"2024-05-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:"
+                f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} "
+                f"{rng.choice(levels)} [worker-{rng.randint(1, 16)}] "
+                + " ".join(rng.choices(words, k=rng.randint(5, 15)))
+                + "\n"
+            )
+            f.write(line)
+            written += len(line)
+
+
+def _write_random(path: str, size: int, rng: random.Random):
+    with open(path, mode="wb") as f:
+        f.write(rng.randbytes(size))
+
+
+def _write_pdf(path: str, size: int, rng: random.Random, words: List[str]):
+    with open(path, mode="wb") as f:
+        f.write(b"%PDF-1.7\n")
+        written, obj = 0, 1
+        while written < size:
+            text = " ".join(rng.choices(words, k=4000)).encode()
+            stream = zlib.compress(text, 6)
+            f.write(
+                f"{obj} 0 obj\n<< /Length {len(stream)} /Filter /FlateDecode >>\n"
+                f"stream\n".encode() + stream + b"\nendstream\nendobj\n"
+            )
+            written += len(stream)
+            obj += 1
+        f.write(b"%%EOF\n")
+
+
+def _write_json(path: str, size: int, rng: random.Random, words: List[str]):
+    with open(path, mode="w", encoding="utf-8") as f:
+        written = 0
+        while written < size:
+            record = {
+                "id": rng.randint(1, 10**9),
+                "name": " ".join(rng.choices(words, k=2)),
+                "tags": rng.choices(words, k=3),
+                "score": round(rng.random() * 100, 3),
+            }
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            written += len(line)
+
+
+def make_corpus(root: str, kind: str, size_mb: int, seed: int = 1):
+    """Generate a synthetic corpus of about size_mb MB under root."""
+    rng = random.Random(seed)
+    words = _words(rng)
+    size = size_mb << 20
+    os.makedirs(root, exist_ok=True)
+    if kind == "text":
+        for i in range(4):
+            _write_text(os.path.join(root, f"app{i}.log"), size // 4, rng, words)
+    elif kind == "media":
+        for i in range(4):
+            ext = ".jpg" if i % 2 else ".bin"
+            _write_random(os.path.join(root, f"media{i}{ext}"), size // 4, rng)
+    elif kind == "pdf":
+        for i in range(4):
+            _write_pdf(os.path.join(root, f"doc{i}.pdf"), size // 4, rng, words)
+    elif kind == "mixed":
+        part = size // 5
+        _write_text(os.path.join(root, "app.log"), part, rng, words)
+        _write_random(os.path.join(root, "photo.jpg"), part, rng)
+        _write_pdf(os.path.join(root, "report.pdf"), part, rng, words)
+        _write_json(os.path.join(root, "records.json"), part, rng, words)
+        small_dir = os.path.join(root, "small")
+        os.makedirs(small_dir, exist_ok=True)
+        count = max(1, part // 4096)
+        for i in range(count):
+            _write_json(
+                os.path.join(small_dir, f"item{i}.json"),
+                rng.randint(100, 8000),
+                rng,
+                words,
+            )
+    else:
+        raise ValueError(f"unknown corpus: {kind}")
+
+
+CORPORA = ("text", "media", "pdf", "mixed")
+
+
+def parse_policy(spec: str) -> Policy:
+    """Policy by name: adaptive, max, or <method>-<level> / <method> for fixed."""
+    if spec in POLICIES and spec != "fixed":
+        return new_policy(spec)
+    method, _, level = spec.partition("-")
+    if method not in METHODS:
+        raise ValueError(f"unknown policy: {spec}")
+    return FixedPolicy(METHODS[method], int(level) if level else None)
+
+
+def run_bench(
+    corpora: List[str],
+    policies: List[str],
+    size_mb: int,
+    jobs: int,
+    log: Callable[[str], Any] = print,
+) -> List[Dict[str, Any]]:
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="zip_bench_") as tmp:
+        for kind in corpora:
+            src = os.path.join(tmp, kind)
+            make_corpus(src, kind, size_mb)
+            for spec in policies:
+                output = os.path.join(tmp, f"{kind}.zip")
+                start = time.perf_counter()
+                stats = create_zip(output, [src], jobs=jobs, policy=parse_policy(spec))
+                elapsed = time.perf_counter() - start
+                packed = os.path.getsize(output)
+                os.unlink(output)
+                row = {
+                    "corpus": kind,
+                    "policy": spec,
+                    "mb": round(stats.bytes_in / (1 << 20), 2),
+                    "seconds": round(elapsed, 3),
+                    "mb_per_s": round(stats.bytes_in / (1 << 20) / elapsed, 1),
+                    "ratio": round(packed / stats.bytes_in, 4),
+                    "methods": dict(sorted(stats.methods.items())),
+                }
+                rows.append(row)
+                log(
+                    f"{kind:<8}{spec:<12}{row['mb_per_s']:>9.1f}{row['ratio']:>8.3f}"
+                    f"  {', '.join(f'{k}={v}' for k, v in row['methods'].items())}"
+                )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark zip compression policies on synthetic corpora."
+    )
+    parser.add_argument(
+        "--corpora",
+        default=",".join(CORPORA),
+        help=f"comma separated corpora (default: {','.join(CORPORA)})",
+    )
+    parser.add_argument(
+        "--policies",
+        default=DEFAULT_POLICIES,
+        help=f"comma separated policies: adaptive, max, or <method>[-<level>] "
+        f"with method in {'/'.join(METHODS)} (default: {DEFAULT_POLICIES})",
+    )
+    parser.add_argument(
+        "--size-mb", type=int, default=32, help="size of each corpus (default: 32)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="compression threads (default: cpu count)",
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, help="Write the JSON report to file"
+    )
+    args = parser.parse_args()
+
+    corpora = [c for c in args.corpora.split(",") if c]
+    policies = [p for p in args.policies.split(",") if p]
+    try:
+        for spec in policies:
+            parse_policy(spec)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{'corpus':<8}{'policy':<12}{'MB/s':>9}{'ratio':>8}  members")
+    rows = run_bench(corpora, policies, args.size_mb, args.jobs)
+    if args.output:
+        report = {"size_mb": args.size_mb, "jobs": args.jobs, "results": rows}
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"report: {args.output}")
+
+
+if __name__ == "__main__":
+    # cli:
+    # cd apps/archive
+    # uv run bench.py
+    # uv run bench.py --corpora mixed --policies deflate-9,adaptive --size-mb 128 -j 8
+
+    main()
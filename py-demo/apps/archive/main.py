@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+import time
+import zipfile
+
+from policy import METHODS, POLICIES, new_policy
+from zip_reader import extract_zip
+from zip_writer import DEFAULT_BLOCK_SIZE, create_zip
+
+
+def _rate(size: int, elapsed: float) -> str:
+    return f"{size / (1 << 20):.1f} MB in {elapsed:.2f}s, {size / (1 << 20) / max(elapsed, 1e-9):.1f} MB/s"
+
+
+def cmd_create(args: argparse.Namespace):
+    policy = new_policy(args.policy, METHODS[args.method], args.level)
+    start = time.perf_counter()
+    stats = create_zip(
+        args.output,
+        args.inputs,
+        jobs=args.jobs,
+        block_size=args.block_size << 10,
+        policy=policy,
+    )
+    elapsed = time.perf_counter() - start
+    packed = os.path.getsize(args.output)
+    ratio = packed / stats.bytes_in if stats.bytes_in else 1.0
+    print(f"create {args.output}: {_rate(stats.bytes_in, elapsed)}, ratio: {ratio:.3f}")
+    methods = ", ".join(f"{k}={v}" for k, v in sorted(stats.methods.items()))
+    print(f"members by method: {methods}")
+
+
+def cmd_extract(args: argparse.Namespace):
+    start = time.perf_counter()
+    stats = extract_zip(args.archive, args.directory, jobs=args.jobs)
+    elapsed = time.perf_counter() - start
+    print(
+        f"extract {args.archive}: files: {stats.files}, dirs: {stats.dirs}, "
+        f"{_rate(stats.bytes_out, elapsed)}"
+    )
+    for name in stats.skipped:
+        print(f"skipped unsafe member name: {name}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-threaded zip archives.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    create = sub.add_parser("create", help="create a zip archive")
+    create.add_argument("output", help="zip file to write")
+    create.add_argument("inputs", nargs="+", help="files and directories to add")
+    create.add_argument(
+        "-p",
+        "--policy",
+        choices=POLICIES,
+        default="adaptive",
+        help="adaptive (default): store incompressible files, deflate the rest by "
+        "sampled compressibility; max: adaptive with lzma for highly compressible "
+        "large files; fixed: --method/--level for every file",
+    )
+    create.add_argument(
+        "-m",
+        "--method",
+        choices=list(METHODS),
+        default="deflate",
+        help="compression method of the fixed policy (default: deflate)",
+    )
+    create.add_argument(
+        "-l",
+        "--level",
+        type=int,
+        default=6,
+        help="deflate level of the fixed and adaptive policies, 0-9 (default: 6)",
+    )
+    create.add_argument(
+        "--block-size",
+        type=int,
+        default=DEFAULT_BLOCK_SIZE >> 10,
+        help=f"deflate block size in KB, blocks of one file are compressed in "
+        f"parallel (default: {DEFAULT_BLOCK_SIZE >> 10})",
+    )
+    create.set_defaults(func=cmd_create)
+
+    extract = sub.add_parser("extract", help="extract a zip archive")
+    extract.add_argument("archive", help="zip file to extract")
+    extract.add_argument(
+        "-d", "--directory", default=".", help="output directory (default: .)"
+    )
+    extract.set_defaults(func=cmd_extract)
+
+    for p in (create, extract):
+        p.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="worker threads (default: cpu count)",
+        )
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # cli:
+    # cd apps/archive
+    # uv run main.py create /tmp/bak.zip /tmp/test/bak -j 8
+    # uv run main.py create /tmp/bak.zip /tmp/test/bak -p fixed -m deflate -l 9
+    # uv run main.py create /tmp/bak.zip /tmp/test/bak -p max
+    # uv run bench.py --size-mb 32
+    # uv run main.py extract /tmp/bak.zip -d /tmp/test/extra -j 8
+
+    main()
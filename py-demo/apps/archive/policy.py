@@ -0,0 +1,126 @@
+import dataclasses
+import os
+import zipfile
+import zlib
+from typing import Optional, Tuple, Union
+
+# 按成员选择压缩方式: 从文件开头/中间/结尾各取一小段, 用 deflate level 1 试压缩估计可压缩性.
+# - 已压缩的格式 (图片, 视频, 压缩包等) 不采样, 直接 store
+# - 试压缩比例接近 1 (随机数据, 加密数据, 内嵌压缩流的 PDF 等) 时 store, 不浪费 CPU
+# - 可压缩性一般的用 level 1, 收益低时不值得用高 level
+# - 可压缩性好的用 deflate (默认 level 6); max 策略对大的高可压缩文件用 lzma
+# 一个成员的选择为 (compress_type, level), level 为 None 时使用压缩库的默认值.
+
+Choice = Tuple[int, Optional[int]]
+
+# 内容本身已经压缩过的扩展名
+COMPRESSED_EXTENSIONS = frozenset(
+    ".7z .aac .apk .avif .br .bz2 .docx .epub .flac .gif .gz .heic .jar .jpeg .jpg "
+    ".lz4 .mkv .mov .mp3 .mp4 .odt .ogg .png .pptx .rar .tgz .webm .webp .whl .xlsx "
+    ".xmind .xz .zip .zst".split()
+)
+SAMPLE_SIZE = 16 * 1024
+SAMPLE_COUNT = 3
+
+STORE: Choice = (zipfile.ZIP_STORED, None)
+
+METHODS = {
+    "store": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+
+def sample_ratio(path: str, size: int) -> float:
+    """Compressed / original size of a few samples at deflate level 1."""
+    with open(path, mode="rb") as f:
+        if size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            data = f.read()
+        else:
+            parts = []
+            step = (size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                parts.append(f.read(SAMPLE_SIZE))
+            data = b"".join(parts)
+    if not data:
+        return 1.0
+    c = zlib.compressobj(1, zlib.DEFLATED, -15)
+    return len(c.compress(data) + c.flush()) / len(data)
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class FixedPolicy:
+    """The same method and level for every member."""
+
+    compress_type: int = zipfile.ZIP_DEFLATED
+    level: Optional[int] = 6
+
+    @property
+    def name(self) -> str:
+        return f"{method_name(self.compress_type)}-{self.level}"
+
+    def choose(self, path: str, size: int) -> Choice:
+        return self.compress_type, self.level
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class AdaptivePolicy:
+    """Store, fast deflate, deflate or lzma per member by sampled compressibility."""
+
+    level: int = 6
+    # 试压缩比例不低于 store_above 时 store, 不低于 fast_above 时用 level 1
+    store_above: float = 0.9
+    fast_above: float = 0.7
+    # 比例低于 lzma_below 且不小于 lzma_min_size 的文件用 lzma, None 表示不使用 lzma
+    lzma_below: Optional[float] = None
+    lzma_min_size: int = 1 << 20
+    # 小于 min_size 的文件压缩收益很小, 直接 store
+    min_size: int = 64
+
+    @property
+    def name(self) -> str:
+        return "max" if self.lzma_below is not None else "adaptive"
+
+    def choose(self, path: str, size: int) -> Choice:
+        if size < self.min_size:
+            return STORE
+        if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+            return STORE
+        ratio = sample_ratio(path, size)
+        if ratio >= self.store_above:
+            return STORE
+        if ratio >= self.fast_above:
+            return zipfile.ZIP_DEFLATED, 1
+        if (
+            self.lzma_below is not None
+            and ratio < self.lzma_below
+            and size >= self.lzma_min_size
+        ):
+            return zipfile.ZIP_LZMA, None
+        return zipfile.ZIP_DEFLATED, self.level
+
+
+def method_name(compress_type: int) -> str:
+    for name, value in METHODS.items():
+        if value == compress_type:
+            return name
+    return str(compress_type)
+
+
+POLICIES = ("fixed", "adaptive", "max")
+Policy = Union[FixedPolicy, AdaptivePolicy]
+
+
+def new_policy(
+    name: str, compress_type: int = zipfile.ZIP_DEFLATED, level: int = 6
+) -> Policy:
+    """fixed: compress_type/level for all, adaptive: sampled, max: adaptive with lzma."""
+    if name == "fixed":
+        return FixedPolicy(compress_type, level)
+    if name == "adaptive":
+        return AdaptivePolicy(level=level)
+    if name == "max":
+        return AdaptivePolicy(level=9, lzma_below=0.5)
+    raise ValueError(f"unknown compression policy: {name}")
@@ -0,0 +1,130 @@
+import dataclasses
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Optional, Set
+
+# 多线程解压: 每个线程打开自己的 ZipFile (不共享文件位置和锁), 成员按块流式解压到临时文件后改名,
+# 内存与成员大小无关. 大成员先提交, 减少最后只剩一个大文件在解压的时间.
+# 单个 deflate 成员只能顺序解压, 并行度来自成员之间.
+
+COPY_BUFFER_SIZE = 1 << 20
+
+
+@dataclasses.dataclass(slots=True)
+class ExtractStats:
+    files: int = 0
+    dirs: int = 0
+    bytes_out: int = 0
+    skipped: List[str] = dataclasses.field(default_factory=list)
+
+
+def member_path(out_dir: str, name: str) -> Optional[str]:
+    """Target path of a member, None for names that would escape out_dir."""
+    # 与 ZipFile.extract 相同: 去掉绝对路径, 盘符和 "..", 只保留合法的路径部分
+    parts = [
+        p for p in name.replace("\\", "/").split("/") if p and p not in (".", "..")
+    ]
+    if not parts:
+        return None
+    return os.path.join(out_dir, *parts)
+
+
+def _restore_attrs(path: str, info: zipfile.ZipInfo):
+    # 只保留读写执行权限: 与 unzip 默认行为相同, 不恢复 setuid/setgid/sticky 位,
+    # 否则以 root 解压构造的归档会得到 setuid 的可执行文件
+    mode = (info.external_attr >> 16) & 0o777
+    if info.create_system == 3 and mode:
+        # unix 系统创建的归档保留权限 (ZipFile.extract 不恢复)
+        os.chmod(path, mode)
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    os.utime(path, (mtime, mtime))
+
+
+class ParallelExtractor:
+    """Extracts members of a zip archive across a thread pool."""
+
+    def __init__(self, file: str, jobs: Optional[int] = None):
+        self.file = file
+        self.jobs = jobs or os.cpu_count() or 1
+        self._local = threading.local()
+        self._opened: List[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def _zipfile(self) -> zipfile.ZipFile:
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.file)
+            with self._lock:
+                self._opened.append(zf)
+        return zf
+
+    def extract_member(self, info: zipfile.ZipInfo, path: str) -> int:
+        """Stream one member to path through a temp file, return the bytes written."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with self._zipfile().open(info) as src, open(tmp_path, mode="wb") as dst:
+                # 读到末尾时 zipfile 校验 CRC, 不一致时抛出 BadZipFile
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            _restore_attrs(tmp_path, info)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return info.file_size
+
+    def extract_all(self, out_dir: str) -> ExtractStats:
+        stats = ExtractStats()
+        with zipfile.ZipFile(self.file) as zf:
+            infos = zf.infolist()
+
+        files = []
+        dirs = []
+        for info in infos:
+            path = member_path(out_dir, info.filename)
+            if path is None:
+                stats.skipped.append(info.filename)
+            elif info.is_dir():
+                os.makedirs(path, exist_ok=True)
+                dirs.append((info, path))
+            else:
+                files.append((info, path))
+        for _, path in files:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        files.sort(key=lambda item: item[0].file_size, reverse=True)
+        pending: Set[Future] = set()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                try:
+                    for info, path in files:
+                        # 限制排队的任务数, 成员很多时不一次性创建所有 Future
+                        while len(pending) >= self.jobs * 4:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            stats.bytes_out += sum(f.result() for f in done)
+                        pending.add(pool.submit(self.extract_member, info, path))
+                    for future in pending:
+                        stats.bytes_out += future.result()
+                except BaseException:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+        finally:
+            for zf in self._opened:
+                zf.close()
+            self._opened.clear()
+
+        stats.files = len(files)
+        stats.dirs = len(dirs)
+        # 目录的时间在其中的文件写完后再设置
+        for info, path in reversed(dirs):
+            _restore_attrs(path, info)
+        return stats
+
+
+def extract_zip(file: str, out_dir: str, jobs: Optional[int] = None) -> ExtractStats:
+    """Extract all members of file into out_dir."""
+    return ParallelExtractor(file, jobs).extract_all(out_dir)
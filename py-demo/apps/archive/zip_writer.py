@@ -0,0 +1,301 @@
+import collections
+import dataclasses
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Deque, Dict, Iterator, List, Optional, Tuple
+
+from policy import METHODS, FixedPolicy, Policy, method_name
+
+# 多线程写 zip: 主线程按顺序读文件, 计算 CRC, 把压缩任务提交给线程池, 再按提交顺序写入归档.
+# zlib/lzma/bz2 压缩时释放 GIL, 线程数可以扩展到 CPU 核数.
+# - deflate: 成员按块切分 (类似 pigz), 每块用前一块末尾 32KB 作为预设字典独立压缩,
+#   非最后一块以 Z_SYNC_FLUSH 结束, 拼接后是一个合法的 deflate 流, 单个大文件也能并行压缩
+# - bzip2/lzma: 流不能切分, 整个成员在一个线程中流式压缩到 SpooledTemporaryFile
+# - store: 原样写入
+# 本地文件头先写占位, 成员写完后回写 CRC 和大小 (与 zipfile 写可 seek 文件的方式相同),
+# 最后由 ZipFile.close() 写中央目录. 排队中的块数有上限, 内存与成员大小无关.
+# 每个成员的压缩方式和 level 由 policy 决定 (见 policy.py), 默认所有成员相同.
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+# deflate 窗口大小
+DICT_SIZE = 32 * 1024
+# bzip2/lzma 成员压缩结果在内存中的上限, 超过后写入临时文件
+SPOOL_MAX_SIZE = 8 << 20
+COPY_BUFFER_SIZE = 1 << 20
+
+
+def compress_block(data: bytes, level: int, zdict: bytes, last: bool) -> bytes:
+    """Raw deflate of one block, primed with the tail of the previous block."""
+    if zdict:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def compress_stream(
+    path: str, compress_type: int, level: Optional[int]
+) -> Tuple[IO[bytes], int, int]:
+    """Compress a whole file with zipfile's compressor, return (spool, crc, size)."""
+    compressor = zipfile._get_compressor(compress_type, level)  # type: ignore
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    crc = size = 0
+    try:
+        with open(path, mode="rb") as f:
+            while chunk := f.read(COPY_BUFFER_SIZE):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                spool.write(compressor.compress(chunk))
+        spool.write(compressor.flush())
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, crc, size
+
+
+@dataclasses.dataclass(slots=True)
+class WriteStats:
+    bytes_in: int = 0
+    # 各压缩方式的成员数
+    methods: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass(slots=True)
+class _Member:
+    zinfo: zipfile.ZipInfo
+    zip64: bool = False
+    crc: int = 0
+    file_size: int = 0
+    compress_size: int = 0
+
+
+class ParallelZipWriter:
+    """Zip writer compressing members across a thread pool, output must be seekable."""
+
+    def __init__(
+        self,
+        file: str,
+        jobs: Optional[int] = None,
+        method: str = "deflate",
+        level: Optional[int] = 6,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        policy: Optional[Policy] = None,
+    ):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.policy = policy or FixedPolicy(METHODS[method], level)
+        self.block_size = block_size
+        self.zf = zipfile.ZipFile(file, mode="w")
+        self._pool = ThreadPoolExecutor(max_workers=self.jobs)
+        # 待写入的 (类型, 成员, 压缩结果), 类型为 start / block / spool / end
+        self._queue: Deque[Tuple[str, _Member, Optional[Future]]] = collections.deque()
+        self._inflight = 0
+        self.max_inflight = self.jobs * 4
+        self.stats = WriteStats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(
+        self,
+        path: str,
+        arcname: Optional[str] = None,
+        compress_type: Optional[int] = None,
+        level: Optional[int] = None,
+    ):
+        """Add a file or directory entry, compression defaults to the policy's choice."""
+        zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+        if zinfo.is_dir():
+            # 目录项没有数据, 等前面的成员写完后直接写入
+            self._drain(wait_all=True)
+            self.zf.write(path, arcname)
+            return
+
+        if compress_type is None:
+            compress_type, level = self.policy.choose(path, zinfo.file_size)
+        zinfo.compress_type = compress_type
+        zinfo._compresslevel = level  # type: ignore
+        name = method_name(compress_type)
+        self.stats.methods[name] = self.stats.methods.get(name, 0) + 1
+        member = _Member(zinfo)
+        self._push("start", member)
+        if zinfo.compress_type in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):
+            self._add_blocks(path, member)
+        else:
+            future = self._pool.submit(
+                compress_stream, path, zinfo.compress_type, zinfo._compresslevel  # type: ignore
+            )
+            self._push("spool", member, future)
+        self._push("end", member)
+
+    def _add_blocks(self, path: str, member: _Member):
+        zinfo = member.zinfo
+        deflate = zinfo.compress_type == zipfile.ZIP_DEFLATED
+        level = zinfo._compresslevel  # type: ignore
+        level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+        with open(path, mode="rb") as f:
+            data = f.read(self.block_size)
+            zdict = b""
+            while True:
+                # 预读下一块, 判断当前块是否为最后一块
+                following = (
+                    f.read(self.block_size) if len(data) == self.block_size else b""
+                )
+                last = not following
+                member.crc = zlib.crc32(data, member.crc)
+                member.file_size += len(data)
+                if deflate:
+                    future = self._pool.submit(compress_block, data, level, zdict, last)
+                else:
+                    future = Future()
+                    future.set_result(data)
+                self._push("block", member, future)
+                if last:
+                    break
+                zdict = data[-DICT_SIZE:]
+                data = following
+        self.stats.bytes_in += member.file_size
+
+    def _push(self, kind: str, member: _Member, future: Optional[Future] = None):
+        self._queue.append((kind, member, future))
+        if future is not None:
+            self._inflight += 1
+        self._drain()
+
+    def _drain(self, wait_all: bool = False):
+        # 按提交顺序写出已完成的结果; 排队的任务超过上限时等待最早的任务
+        queue = self._queue
+        while queue:
+            kind, member, future = queue[0]
+            if future is not None and not future.done():
+                if not wait_all and self._inflight <= self.max_inflight:
+                    return
+            queue.popleft()
+            if future is not None:
+                self._inflight -= 1
+            if kind == "start":
+                self._start_member(member)
+            elif kind == "block":
+                self._write_block(member, future.result())  # type: ignore
+            elif kind == "spool":
+                self._write_spool(member, *future.result())  # type: ignore
+            else:
+                self._end_member(member)
+
+    def _start_member(self, member: _Member):
+        zf, zinfo = self.zf, member.zinfo
+        zinfo.compress_size = 0
+        zinfo.CRC = 0
+        zinfo.flag_bits = 0x00
+        if zinfo.compress_type == zipfile.ZIP_LZMA:
+            # 压缩数据包含 EOS 标记, 与 zipfile 相同
+            zinfo.flag_bits |= zipfile._MASK_COMPRESS_OPTION_1  # type: ignore
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+        # 压缩后可能比原文件大, 与 zipfile 相同按 1.05 倍判断是否需要 zip64
+        member.zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        zf.fp.seek(zf.start_dir)  # type: ignore
+        zinfo.header_offset = zf.fp.tell()  # type: ignore
+        zf._writecheck(zinfo)  # type: ignore
+        zf._didModify = True  # type: ignore
+        zf.fp.write(zinfo.FileHeader(member.zip64))  # type: ignore
+
+    def _write_block(self, member: _Member, data: bytes):
+        self.zf.fp.write(data)  # type: ignore
+        member.compress_size += len(data)
+
+    def _write_spool(self, member: _Member, spool: IO[bytes], crc: int, size: int):
+        with spool:
+            shutil.copyfileobj(spool, self.zf.fp, COPY_BUFFER_SIZE)  # type: ignore
+            member.compress_size = spool.tell()
+        member.crc = crc
+        member.file_size = size
+        self.stats.bytes_in += size
+
+    def _end_member(self, member: _Member):
+        zf, zinfo = self.zf, member.zinfo
+        zinfo.CRC = member.crc
+        zinfo.file_size = member.file_size
+        zinfo.compress_size = member.compress_size
+        if not member.zip64 and max(member.file_size, member.compress_size) > (
+            zipfile.ZIP64_LIMIT
+        ):
+            raise RuntimeError(f"{zinfo.filename}: file grew beyond the zip64 limit")
+
+        # 回写本地文件头中的 CRC 和大小
+        fp = zf.fp
+        zf.start_dir = fp.tell()  # type: ignore
+        fp.seek(zinfo.header_offset)  # type: ignore
+        fp.write(zinfo.FileHeader(member.zip64))  # type: ignore
+        fp.seek(zf.start_dir)  # type: ignore
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+
+    def close(self):
+        try:
+            self._drain(wait_all=True)
+        finally:
+            self._pool.shutdown(wait=True)
+            self.zf.close()
+
+    def abort(self):
+        """Stop without writing the remaining members, the archive is left incomplete."""
+        for _, _, future in self._queue:
+            if future is not None:
+                future.cancel()
+        self._queue.clear()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.zf.close()
+
+
+def iter_sources(inputs: List[str]) -> Iterator[Tuple[str, str]]:
+    """Expand files and directories to (path, arcname), directories recursively."""
+    for src in inputs:
+        src = os.path.normpath(src)
+        if not os.path.isdir(src):
+            yield src, os.path.basename(src)
+            continue
+        # 与 zip -r 相同, 成员名以目录名开头
+        base = os.path.dirname(os.path.abspath(src))
+        for root, dirs, files in os.walk(src):
+            dirs.sort()
+            yield root, os.path.relpath(os.path.abspath(root), base)
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                yield path, os.path.relpath(os.path.abspath(path), base)
+
+
+def create_zip(
+    output: str,
+    inputs: List[str],
+    jobs: Optional[int] = None,
+    method: str = "deflate",
+    level: Optional[int] = 6,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    policy: Optional[Policy] = None,
+) -> WriteStats:
+    """Create output from files and directories."""
+    # 写到临时文件, 完成后再改名, 失败时不留下不完整的归档
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    try:
+        with ParallelZipWriter(
+            tmp_path, jobs, method, level, block_size, policy
+        ) as writer:
+            for path, arcname in iter_sources(inputs):
+                writer.write(path, arcname)
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return writer.stats
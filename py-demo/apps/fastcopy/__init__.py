@@ -0,0 +1,2 @@
+def pkg_help():
+    print("App: Parallel, resumable directory tree copy with zero-copy transfers.")
@@ -0,0 +1,59 @@
+import json
+import os
+import time
+from typing import Dict, Optional, TextIO, Tuple
+
+# 断点续传日志: 每复制完成一个文件追加一行 [相对路径, 大小, mtime_ns] (JSON, 路径可含任意字符).
+# 中断后再次运行时, 日志中大小和 mtime 与源文件一致的文件直接跳过, 不需要再 stat/hash 目标文件.
+# 复制全部成功后删除日志. 进程被杀时最后一行可能不完整, 加载时忽略.
+
+JOURNAL_NAME = ".fastcopy_journal"
+
+
+class Journal:
+    """Append-only record of the files already copied, only used from the main thread."""
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file: Optional[TextIO] = None
+        self._last_flush = 0.0
+
+    def load(self) -> Dict[str, Tuple[int, int]]:
+        """Files done by a previous interrupted run: {rel path: (size, mtime_ns)}."""
+        done: Dict[str, Tuple[int, int]] = {}
+        try:
+            with open(self.path, mode="r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    try:
+                        rel, size, mtime_ns = json.loads(line)
+                    except ValueError:
+                        continue
+                    done[rel] = (size, mtime_ns)
+        except FileNotFoundError:
+            pass
+        return done
+
+    def open(self, resume: bool = True):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, mode="a" if resume else "w", encoding="utf-8")
+        self._last_flush = time.monotonic()
+
+    def record(self, rel: str, size: int, mtime_ns: int):
+        assert self._file is not None
+        self._file.write(json.dumps([rel, size, mtime_ns], ensure_ascii=False) + "\n")
+        # 按时间间隔刷到磁盘, 中断时最多重复复制最近一个间隔内完成的文件
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self, remove: bool = False):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
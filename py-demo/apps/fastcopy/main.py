@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import time
+
+from copier import SKIP_POLICIES, CopyStats, copy_tree
+from journal import JOURNAL_NAME
+
+
+def print_report(stats: CopyStats, elapsed: float, max_errors: int = 20):
+    elapsed = max(elapsed, 1e-9)
+    mb = stats.bytes_copied / (1 << 20)
+    print(
+        f"files: {stats.files}, copied: {stats.copied}, skipped: {stats.skipped} "
+        f"(resumed: {stats.resumed}), failed: {stats.failed}, "
+        f"dirs: {stats.dirs}, links: {stats.links}"
+    )
+    if stats.methods:
+        methods = ", ".join(f"{k}={v}" for k, v in sorted(stats.methods.items()))
+        print(f"copy methods: {methods}")
+    print(
+        f"elapsed: {elapsed:.2f}s, {stats.copied / elapsed:.1f} files/s, "
+        f"{mb:.1f} MB, {mb / elapsed:.1f} MB/s"
+    )
+    for rel, error in stats.errors[:max_errors]:
+        print(f"failed: {rel}: {error}", file=sys.stderr)
+    if len(stats.errors) > max_errors:
+        print(
+            f"... and {len(stats.errors) - max_errors} more failures", file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy a directory tree with a thread pool, skip unchanged files "
+        "and resume interrupted copies."
+    )
+    parser.add_argument("src", help="source directory")
+    parser.add_argument("dst", help="destination directory, created if missing")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=min(32, (os.cpu_count() or 1) * 4),
+        help="copy threads (default: 4 x cpu count, at most 32)",
+    )
+    parser.add_argument(
+        "--skip",
+        choices=SKIP_POLICIES,
+        default="mtime",
+        help="skip files already in dst with the same size (size), size and mtime "
+        "(mtime, default), or content hash (hash); none copies everything",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help=f"ignore the journal ({JOURNAL_NAME} in dst) of an interrupted copy",
+    )
+    parser.add_argument(
+        "--batch-files",
+        type=int,
+        default=64,
+        help="files per task submitted to the thread pool (default: 64)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not print progress"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        stats = copy_tree(
+            args.src,
+            args.dst,
+            jobs=args.jobs,
+            skip=args.skip,
+            resume=not args.no_resume,
+            batch_files=args.batch_files,
+            progress_interval=0 if args.quiet else 2.0,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(
+            f"\ninterrupted, run again to resume from {JOURNAL_NAME}", file=sys.stderr
+        )
+        sys.exit(130)
+
+    print_report(stats, time.perf_counter() - start)
+    if stats.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # cli:
+    # cd apps/fastcopy
+    # uv run main.py /data/photos /backup/photos
+    # uv run main.py /data/photos /backup/photos -j 16 --skip hash
+    # uv run main.py /data/photos /backup/photos --no-resume
+
+    main()
@@ -0,0 +1,4 @@
+def pkg_help():
+    print(
+        "App: HTTP load generator and benchmark for the fast api demo and rest api server."
+    )
@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import dataclasses
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+PY_DEMO_HOME = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# 可启动的被测服务: 目录 (相对 py-demo) 和默认请求组合
+TARGETS = {
+    "fast_api": {
+        "cwd": "examples/fast_api",
+        "mix": "GET /healthz *5,GET /test/sleep?duration=0.01 *1",
+    },
+    "rest_api": {
+        "cwd": "rest_api",
+        "mix": "GET /users/?limit=20 *5,GET /users/1 *5,GET /users/cache/stats *1",
+    },
+}
+
+
+_MIX_ITEM_SEP = re.compile(r",\s*(?=[A-Za-z]+\s+/)")
+_MIX_WEIGHT = re.compile(r"^(.*?)\s+\*\s*(\d+(?:\.\d+)?)$")
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class RequestSpec:
+    method: str
+    path: str
+    weight: float = 1.0
+    body: Optional[Any] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+@dataclasses.dataclass(slots=True)
+class WorkerResult:
+    # 每个请求: (请求名, 状态码 (异常为 0), 延迟秒)
+    samples: List[Tuple[str, int, float]] = dataclasses.field(default_factory=list)
+    errors: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+def parse_mix(mix: str) -> List[RequestSpec]:
+    """Parse "GET /path?a=1 *5,POST /other" into request specs, weight defaults to 1."""
+    specs = []
+    # 权重用 " *N" 标记, "=" 和 "," 可以出现在 query 中 (如 ?limit=50&fields=id,username),
+    # 只在逗号后面紧跟 "METHOD /" 时才作为请求之间的分隔
+    for item in _MIX_ITEM_SEP.split(mix):
+        item = item.strip()
+        if not item:
+            continue
+        method, _, rest = item.partition(" ")
+        path, weight = rest.strip(), 1.0
+        m = _MIX_WEIGHT.match(path)
+        if m:
+            path, weight = m.group(1), float(m.group(2))
+        specs.append(RequestSpec(method.upper(), path, weight))
+    return specs
+
+
+def load_mix_file(path: str) -> List[RequestSpec]:
+    """JSON list of {"method", "path", "weight", "json"}, for requests with a body."""
+    with open(path, mode="r", encoding="utf-8") as f:
+        items = json.load(f)
+    return [
+        RequestSpec(
+            i.get("method", "GET").upper(),
+            i["path"],
+            float(i.get("weight", 1)),
+            i.get("json"),
+        )
+        for i in items
+    ]
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    specs: List[RequestSpec],
+    deadline: float,
+    rng: random.Random,
+    result: WorkerResult,
+):
+    weights = [s.weight for s in specs]
+    while time.perf_counter() < deadline:
+        spec = rng.choices(specs, weights)[0]
+        start = time.perf_counter()
+        try:
+            resp = await client.request(spec.method, spec.path, json=spec.body)
+            await resp.aread()
+            status = resp.status_code
+        except httpx.HTTPError as e:
+            status = 0
+            key = type(e).__name__
+            result.errors[key] = result.errors.get(key, 0) + 1
+        result.samples.append((spec.name, status, time.perf_counter() - start))
+
+
+async def run_load(
+    base_url: str,
+    specs: List[RequestSpec],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> WorkerResult:
+    result = WorkerResult()
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(
+                _worker(
+                    client, specs, deadline, random.Random(seed * 100003 + i), result
+                )
+                for i in range(concurrency)
+            )
+        )
+    return result
+
+
+def _process_entry(
+    args: Tuple[str, List[RequestSpec], int, float, int],
+) -> WorkerResult:
+    base_url, specs, concurrency, duration, seed = args
+    return asyncio.run(run_load(base_url, specs, concurrency, duration, seed))
+
+
+def run_processes(
+    base_url: str,
+    specs: List[RequestSpec],
+    concurrency: int,
+    duration: float,
+    processes: int,
+) -> WorkerResult:
+    """Split the concurrency across processes, for when one event loop becomes the bottleneck."""
+    if processes <= 1:
+        return asyncio.run(run_load(base_url, specs, concurrency, duration))
+
+    per_process = [concurrency // processes] * processes
+    for i in range(concurrency % processes):
+        per_process[i] += 1
+    jobs = [(base_url, specs, c, duration, i) for i, c in enumerate(per_process) if c]
+    with multiprocessing.Pool(len(jobs)) as pool:
+        parts = pool.map(_process_entry, jobs)
+
+    merged = WorkerResult()
+    for part in parts:
+        merged.samples.extend(part.samples)
+        for key, count in part.errors.items():
+            merged.errors[key] = merged.errors.get(key, 0) + count
+    return merged
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    stats = {
+        f"p{int(q * 100)}_ms": round(_percentile(values, q) * 1000, 3)
+        for q in (0.5, 0.9, 0.95, 0.99)
+    }
+    stats["mean_ms"] = round(sum(values) / len(values) * 1000, 3) if values else 0.0
+    stats["max_ms"] = round(values[-1] * 1000, 3) if values else 0.0
+    return stats
+
+
+def build_report(result: WorkerResult, elapsed: float, config: Dict[str, Any]) -> Dict:
+    def summarize(samples: List[Tuple[str, int, float]]) -> Dict[str, Any]:
+        total = len(samples)
+        # 状态码为 0 (连接异常) 或 >= 400 记为错误
+        errors = sum(1 for _, status, _ in samples if status == 0 or status >= 400)
+        return {
+            "requests": total,
+            "rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "latency": _latency_stats([lat for _, _, lat in samples]),
+        }
+
+    by_name: Dict[str, List[Tuple[str, int, float]]] = {}
+    status_codes: Dict[str, int] = {}
+    for sample in result.samples:
+        by_name.setdefault(sample[0], []).append(sample)
+        status_codes[str(sample[1])] = status_codes.get(str(sample[1]), 0) + 1
+
+    return {
+        "config": config,
+        "commit": _git_commit(),
+        "elapsed_s": round(elapsed, 3),
+        **summarize(result.samples),
+        "status_codes": status_codes,
+        "exceptions": result.errors,
+        "endpoints": {name: summarize(samples) for name, samples in by_name.items()},
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PY_DEMO_HOME,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def spawn_server(target: str, port: int, db_path: str) -> subprocess.Popen:
+    """Start the target app with uvicorn on sqlite and wait until it serves requests."""
+    env = {
+        **os.environ,
+        "DB_URL": f"sqlite:///{db_path}",
+        "DB_PASSWORD": "",
+        "DB_DATABASE": "",
+        # 压测流量都来自本机一个 IP, 开启准入控制时测到的是限流而不是服务本身
+        "ADMISSION_ENABLED": "false",
+    }
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=os.path.join(PY_DEMO_HOME, TARGETS[target]["cwd"]),
+        env=env,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{target} server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/openapi.json").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    proc.terminate()
+    raise RuntimeError(f"{target} server is not ready in 30s")
+
+
+def seed_users(base_url: str, count: int):
+    users = [
+        {"username": f"load{i}", "email": f"load{i}@test.com", "password": "123456"}
+        for i in range(count)
+    ]
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        resp = client.post("/users/bulk?on_conflict=update", json=users)
+        resp.raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load generator.")
+    parser.add_argument("--url", type=str, help="Base url of a running server")
+    parser.add_argument(
+        "--spawn",
+        choices=list(TARGETS),
+        help="Start the target app on sqlite instead of using --url",
+    )
+    parser.add_argument("--port", type=int, default=18081, help="Port for --spawn")
+    parser.add_argument("--mix", type=str, help='Request mix: "GET /path *weight,..."')
+    parser.add_argument(
+        "--mix-file", type=str, help="JSON request mix, supports bodies"
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("-p", "--processes", type=int, default=1)
+    parser.add_argument("--seed-users", type=int, default=1000, help="rest_api only")
+    parser.add_argument(
+        "-o", "--output", type=str, help="Write the JSON report to file"
+    )
+    args = parser.parse_args()
+
+    if not args.url and not args.spawn:
+        parser.error("one of --url or --spawn is required")
+
+    proc = None
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        base_url = args.url
+        if args.spawn:
+            proc = spawn_server(
+                args.spawn, args.port, os.path.join(tmp_dir.name, "loadgen.db")
+            )
+            base_url = f"http://127.0.0.1:{args.port}"
+            if args.spawn == "rest_api" and args.seed_users:
+                seed_users(base_url, args.seed_users)
+
+        if args.mix_file:
+            specs = load_mix_file(args.mix_file)
+        else:
+            mix = args.mix or (TARGETS[args.spawn]["mix"] if args.spawn else "GET /")
+            specs = parse_mix(mix)
+
+        start = time.perf_counter()
+        result = run_processes(
+            base_url, specs, args.concurrency, args.duration, args.processes
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        tmp_dir.cleanup()
+
+    config = {
+        "url": base_url,
+        "target": args.spawn,
+        "mix": [dataclasses.asdict(s) for s in specs],
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "processes": args.processes,
+    }
+    report = json.dumps(build_report(result, elapsed, config), indent=2)
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"Dump to {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    # cli:
+    # cd apps/loadgen
+    # uv run main.py --spawn rest_api -c 100 -d 30 -o report.json
+    # uv run main.py --spawn fast_api --mix "GET /healthz *3,GET /test/sleep?duration=0.01" -p 4 -c 200
+    # uv run main.py --url http://localhost:8081 --mix "GET /users/?limit=50"
+
+    main()
@@ -0,0 +1,4 @@
+def pkg_help():
+    print(
+        "App: Safe, rate-limited parallel deletion of directory trees with a manifest."
+    )
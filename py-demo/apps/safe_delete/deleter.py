@@ -0,0 +1,279 @@
+import dataclasses
+import fnmatch
+import json
+import os
+import stat
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional, Set, TextIO, Tuple
+
+# 安全删除: 用 os.scandir 遍历一次 (显式栈, 不跟随符号链接), 先把要删除的条目写入 manifest,
+# 再用线程池按批删除文件, 最后自底向上删除变空的目录.
+# 删除有速率上限 (每秒操作数和每秒字节数), 避免在繁忙的机器上占满磁盘 I/O.
+# manifest 可以先 --dry-run 生成, 检查后再按 manifest 删除, 此时大小或 mtime 已变化的文件不删除.
+# manifest 中的路径不能是绝对路径或包含 "..", 每次删除前检查父目录的真实路径仍在根目录下
+# (lstat 会跟随父目录中的符号链接, 父目录被替换为符号链接时大小和 mtime 的检查仍能通过).
+
+MANIFEST_VERSION = 1
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Target:
+    # 相对根目录的路径
+    path: str
+    kind: str  # file / link / dir
+    size: int = 0
+    mtime_ns: int = 0
+
+
+@dataclasses.dataclass(slots=True)
+class DeleteStats:
+    files: int = 0
+    dirs: int = 0
+    bytes_freed: int = 0
+    # 已不存在或与 manifest 不一致的条目
+    skipped: int = 0
+    # 删除文件后仍不为空的目录
+    kept_dirs: int = 0
+    failures: List[Tuple[str, str]] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ScanFilter:
+    # 只删除名字匹配其中之一的文件, 为空时不过滤
+    patterns: Tuple[str, ...] = ()
+    # 只删除 mtime 早于该时间 (秒) 的文件
+    older_than: Optional[float] = None
+    # 不进入其他文件系统 (挂载点)
+    one_file_system: bool = False
+
+    @property
+    def active(self) -> bool:
+        return bool(self.patterns) or self.older_than is not None
+
+    def match(self, name: str, mtime_ns: int) -> bool:
+        if self.patterns and not any(fnmatch.fnmatch(name, p) for p in self.patterns):
+            return False
+        if self.older_than is not None and mtime_ns / 1e9 >= self.older_than:
+            return False
+        return True
+
+
+def scan(
+    root: str,
+    scan_filter: ScanFilter = ScanFilter(),
+    include_dirs: bool = True,
+    errors: Optional[List[Tuple[str, str]]] = None,
+) -> Iterator[Target]:
+    """Yield files and links to delete, then directories deepest first.
+
+    Directories that cannot be read are appended to errors and skipped.
+    """
+    root_dev = os.lstat(root).st_dev
+    dirs = [""]
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                entries = [(e.name, e.stat(follow_symlinks=False)) for e in it]
+        except OSError as e:
+            if errors is not None:
+                errors.append((rel_dir or ".", str(e)))
+            continue
+        for name, st in entries:
+            rel = os.path.join(rel_dir, name)
+            if stat.S_ISDIR(st.st_mode):
+                if scan_filter.one_file_system and st.st_dev != root_dev:
+                    continue
+                stack.append(rel)
+                dirs.append(rel)
+            elif scan_filter.match(name, st.st_mtime_ns):
+                kind = "link" if stat.S_ISLNK(st.st_mode) else "file"
+                yield Target(rel, kind, st.st_size, st.st_mtime_ns)
+    if include_dirs:
+        # 父目录在子目录之前加入, 倒序即自底向上
+        for rel in reversed(dirs):
+            yield Target(rel, "dir")
+
+
+def write_manifest(
+    path: str, root: str, targets: Iterator[Target], scan_filter: ScanFilter
+) -> List[Target]:
+    """Write the targets as JSON lines after a header line, return them."""
+    result = []
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as f:
+        header = {
+            "version": MANIFEST_VERSION,
+            "root": os.path.abspath(root),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "filter": dataclasses.asdict(scan_filter),
+        }
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for target in targets:
+            f.write(json.dumps(dataclasses.asdict(target), ensure_ascii=False) + "\n")
+            result.append(target)
+    os.replace(tmp_path, path)
+    return result
+
+
+def check_target_path(path: str):
+    """Raise ValueError if a target path is not a plain path relative to the root."""
+    if os.path.isabs(path) or ".." in path.split(os.sep):
+        raise ValueError(f"invalid path in manifest, must be under the root: {path!r}")
+
+
+def read_manifest(path: str) -> Tuple[str, List[Target]]:
+    """Return (root, targets) of a manifest written by write_manifest."""
+    with open(path, mode="r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version: {header.get('version')}")
+        targets = [Target(**json.loads(line)) for line in f if line.strip()]
+    for target in targets:
+        check_target_path(target.path)
+    return header["root"], targets
+
+
+def _outside_root(real_root: str, path: str) -> bool:
+    # 只解析父目录: 要删除的条目本身可以是符号链接 (删除链接而不是其目标)
+    parent = os.path.realpath(os.path.dirname(path))
+    return os.path.commonpath([real_root, parent]) != real_root
+
+
+class Throttle:
+    """Caps operations and bytes per second across threads, 0 means no limit."""
+
+    def __init__(
+        self, ops_per_s: float = 0, bytes_per_s: float = 0, burst: float = 0.5
+    ):
+        self.limits = [(ops_per_s, 0), (bytes_per_s, 1)]
+        # 允许的突发时长 (秒)
+        self.burst = burst
+        self._clocks = [0.0, 0.0]
+        self._lock = threading.Lock()
+
+    def wait(self, ops: int, nbytes: int):
+        # 每个限制维护一个时钟: 每次调用按 cost / rate 向后预约, 调用方睡眠到预约的开始时间
+        costs = (ops, nbytes)
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            for rate, i in self.limits:
+                if rate <= 0:
+                    continue
+                start = max(self._clocks[i], now - self.burst)
+                self._clocks[i] = start + costs[i] / rate
+                delay = max(delay, start - now)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _has_entries(path: str) -> bool:
+    # 目录不可读时无法判断, 按删除失败处理
+    try:
+        return os.path.isdir(path) and bool(os.listdir(path))
+    except OSError:
+        return False
+
+
+def _delete_batch(
+    root: str, batch: List[Target], verify: bool, throttle: Throttle
+) -> DeleteStats:
+    throttle.wait(len(batch), sum(t.size for t in batch))
+    stats = DeleteStats()
+    real_root = os.path.realpath(root)
+    for target in batch:
+        path = os.path.join(root, target.path)
+        try:
+            if _outside_root(real_root, path):
+                stats.failures.append((target.path, "parent directory is outside root"))
+                continue
+            if verify:
+                # 按 manifest 删除: 文件在生成 manifest 之后被修改过时不删除
+                st = os.lstat(path)
+                if (st.st_size, st.st_mtime_ns) != (target.size, target.mtime_ns):
+                    stats.skipped += 1
+                    continue
+            os.unlink(path)
+            stats.files += 1
+            stats.bytes_freed += target.size
+        except FileNotFoundError:
+            stats.skipped += 1
+        except OSError as e:
+            stats.failures.append((target.path, str(e)))
+    return stats
+
+
+def _merge(total: DeleteStats, part: DeleteStats):
+    total.files += part.files
+    total.bytes_freed += part.bytes_freed
+    total.skipped += part.skipped
+    total.failures.extend(part.failures)
+
+
+def delete_targets(
+    root: str,
+    targets: List[Target],
+    jobs: int = 4,
+    batch_size: int = 256,
+    throttle: Optional[Throttle] = None,
+    verify: bool = False,
+    keep_root: bool = False,
+) -> DeleteStats:
+    """Delete files in parallel batches, then the directories that became empty."""
+    throttle = throttle or Throttle()
+    stats = DeleteStats()
+    files = [t for t in targets if t.kind != "dir"]
+    dirs = [t for t in targets if t.kind == "dir"]
+
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for i in range(0, len(files), batch_size):
+            # 限制排队的批次数, 速率受限时不预先提交全部批次
+            while len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge(stats, future.result())
+            batch = files[i : i + batch_size]
+            pending.add(pool.submit(_delete_batch, root, batch, verify, throttle))
+        for future in pending:
+            _merge(stats, future.result())
+
+    # 目录需要自底向上顺序删除, 在主线程中进行
+    real_root = os.path.realpath(root)
+    for target in dirs:
+        if keep_root and target.path == "":
+            continue
+        throttle.wait(1, 0)
+        path = os.path.join(root, target.path)
+        try:
+            if target.path and _outside_root(real_root, path):
+                stats.failures.append((target.path, "parent directory is outside root"))
+                continue
+            os.rmdir(path)
+            stats.dirs += 1
+        except FileNotFoundError:
+            stats.skipped += 1
+        except OSError as e:
+            if _has_entries(path):
+                # 还有未匹配过滤条件的文件, 保留目录
+                stats.kept_dirs += 1
+            else:
+                stats.failures.append((target.path or ".", str(e)))
+    return stats
+
+
+def summarize(targets: List[Target]) -> Tuple[int, int, int]:
+    """Return (files, bytes, dirs) of the targets."""
+    files = [t for t in targets if t.kind != "dir"]
+    return len(files), sum(t.size for t in files), len(targets) - len(files)
+
+
+def print_failures(out: TextIO, failures: List[Tuple[str, str]], limit: int = 20):
+    for path, error in failures[:limit]:
+        print(f"failed: {path}: {error}", file=out)
+    if len(failures) > limit:
+        print(f"... and {len(failures) - limit} more failures", file=out)
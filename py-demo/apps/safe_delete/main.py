@@ -0,0 +1,224 @@
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+from typing import List, Tuple
+
+from deleter import (
+    DeleteStats,
+    ScanFilter,
+    Throttle,
+    delete_targets,
+    print_failures,
+    read_manifest,
+    scan,
+    summarize,
+    write_manifest,
+)
+
+
+def is_protected(path: str) -> bool:
+    """/, top level directories like /var, and the home directory."""
+    real = os.path.realpath(path)
+    parts = [p for p in real.split(os.sep) if p]
+    return len(parts) < 2 or real == os.path.realpath(os.path.expanduser("~"))
+
+
+def is_under(path: str, root: str) -> bool:
+    real_root = os.path.realpath(root)
+    return os.path.commonpath([os.path.realpath(path), real_root]) == real_root
+
+
+def default_manifest(root: str) -> str:
+    """In the current directory, or next to root when the current directory is in it."""
+    name = f"safe_delete_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    if is_under(os.getcwd(), root):
+        return os.path.join(os.path.dirname(os.path.realpath(root)), name)
+    return name
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1 << 20):.1f} MB"
+
+
+def print_report(stats: DeleteStats, elapsed: float):
+    print(
+        f"deleted files: {stats.files}, freed: {_mb(stats.bytes_freed)}, "
+        f"dirs: {stats.dirs}, kept dirs: {stats.kept_dirs}, "
+        f"skipped: {stats.skipped}, failed: {len(stats.failures)}"
+    )
+    print(f"elapsed: {elapsed:.2f}s, {stats.files / max(elapsed, 1e-9):.0f} files/s")
+    print_failures(sys.stderr, stats.failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Delete a directory tree (or the files matching filters) in "
+        "rate-limited parallel batches, recording a manifest first."
+    )
+    parser.add_argument("root", nargs="?", help="directory to clean up")
+    parser.add_argument(
+        "--from-manifest",
+        type=str,
+        help="delete the entries of a manifest from an earlier --dry-run instead of "
+        "scanning, files changed since then are kept",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        type=str,
+        help="manifest to write, outside root (default: ./safe_delete_<time>.jsonl, "
+        "or next to root when the current directory is inside it)",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="scan and write the manifest without deleting",
+    )
+    parser.add_argument(
+        "--pattern",
+        action="append",
+        default=[],
+        help='only delete files whose name matches, e.g. "*.log" (repeatable)',
+    )
+    parser.add_argument(
+        "--older-than",
+        type=float,
+        help="only delete files last modified more than this many days ago",
+    )
+    parser.add_argument(
+        "--prune-dirs",
+        action="store_true",
+        help="with --pattern/--older-than, also remove directories left empty",
+    )
+    parser.add_argument(
+        "--keep-root", action="store_true", help="do not remove the root directory"
+    )
+    parser.add_argument(
+        "-x",
+        "--one-file-system",
+        action="store_true",
+        help="do not descend into other file systems",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="delete threads (default: 4)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="files per batch (default: 256)",
+    )
+    parser.add_argument(
+        "--max-ops",
+        type=float,
+        default=2000,
+        help="max unlink/rmdir operations per second, 0 for no limit (default: 2000)",
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=0,
+        help="max MB of files deleted per second, 0 for no limit (default: 0)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="allow deleting top level directories and the home directory",
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, help="Write the JSON report to file"
+    )
+    args = parser.parse_args()
+
+    if bool(args.root) == bool(args.from_manifest):
+        parser.error("one of root or --from-manifest is required")
+
+    start = time.perf_counter()
+    scan_errors: List[Tuple[str, str]] = []
+    if args.from_manifest:
+        try:
+            root, targets = read_manifest(args.from_manifest)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        # rmdir(".") 会失败 (EINVAL), 用绝对路径
+        root = os.path.abspath(args.root)
+    if not os.path.isdir(root) or os.path.islink(root):
+        print(f"Error: not a directory: {root}", file=sys.stderr)
+        sys.exit(1)
+    # 扫描之前检查, 不遍历 / 和 home 目录
+    if is_protected(root) and not args.force:
+        print(f"Error: refusing to delete {root}, use --force", file=sys.stderr)
+        sys.exit(1)
+    if not args.from_manifest:
+        scan_filter = ScanFilter(
+            tuple(args.pattern),
+            time.time() - args.older_than * 86400 if args.older_than else None,
+            args.one_file_system,
+        )
+        # manifest 不能写在要删除的目录中, 否则会扫描到它自己 (及其临时文件)
+        manifest = args.manifest or default_manifest(root)
+        if is_under(manifest, root):
+            print(
+                f"Error: manifest must be outside {root}: {manifest}", file=sys.stderr
+            )
+            sys.exit(1)
+        targets = write_manifest(
+            manifest,
+            root,
+            scan(
+                root,
+                scan_filter,
+                include_dirs=not scan_filter.active or args.prune_dirs,
+                errors=scan_errors,
+            ),
+            scan_filter,
+        )
+        print(f"manifest: {manifest}")
+
+    files, size, dirs = summarize(targets)
+    print(
+        f"{'to delete' if args.dry_run else 'deleting'}: {files} files, "
+        f"{_mb(size)}, {dirs} dirs under {root}"
+    )
+    print_failures(sys.stderr, scan_errors)
+    if args.dry_run:
+        return
+
+    stats = delete_targets(
+        root,
+        targets,
+        jobs=args.jobs,
+        batch_size=args.batch_size,
+        throttle=Throttle(args.max_ops, args.max_mb * (1 << 20)),
+        verify=bool(args.from_manifest),
+        keep_root=args.keep_root,
+    )
+    stats.failures[:0] = scan_errors
+    elapsed = time.perf_counter() - start
+    print_report(stats, elapsed)
+
+    if args.output:
+        report = dataclasses.asdict(stats)
+        report["root"] = os.path.abspath(root)
+        report["elapsed"] = round(elapsed, 3)
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"report: {args.output}")
+    if stats.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # cli:
+    # cd apps/safe_delete
+    # uv run main.py /data/logs/app --pattern "*.log" --older-than 7 --dry-run -m logs.jsonl
+    # uv run main.py --from-manifest logs.jsonl --max-ops 500
+    # uv run main.py /tmp/test/bak --max-mb 200 -j 8
+
+    main()
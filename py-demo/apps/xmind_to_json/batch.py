@@ -0,0 +1,237 @@
+import dataclasses
+import functools
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from cache import ConversionCache
+from converter import ConvertOptions, convert_file
+
+# 批量转换: 目录/glob 展开为文件列表, 用进程池并行转换.
+# 输出比输入新 (mtime) 或内容 hash 与 manifest 中记录的相同时跳过, 单个文件失败不影响其他文件.
+# manifest 同时记录上次转换的选项 (格式, 缩进等), 选项变化后不跳过.
+# 多个输入映射到同一个输出文件时 (如不同目录下的同名文件), 这些输入都按失败处理, 不互相覆盖.
+
+MANIFEST_NAME = ".xmind_manifest.json"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class BatchTask:
+    input: str
+    output: str
+    size: int
+    # manifest 中记录的上次转换时的 hash 和选项 (ConvertOptions.output_key)
+    last_hash: Optional[str] = None
+    last_options: Optional[str] = None
+
+
+@dataclasses.dataclass(slots=True)
+class BatchResult:
+    input: str
+    output: str
+    size: int
+    status: str  # converted / skipped / failed
+    seconds: float = 0.0
+    hash: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def is_batch_input(path: str) -> bool:
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def _glob_base(pattern: str) -> str:
+    # glob 中第一个通配符之前的目录, 作为输出相对路径的起点
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    base = os.sep.join(parts)
+    return base if os.path.isdir(base) else os.path.dirname(base)
+
+
+def expand_inputs(patterns: List[str]) -> List[Tuple[str, str]]:
+    """Expand files, directories and globs to [(xmind file, base dir)]."""
+    found: Dict[str, str] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".xmind"):
+                        found.setdefault(os.path.join(root, name), pattern)
+        elif glob.has_magic(pattern):
+            base = _glob_base(pattern)
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    found.setdefault(path, base)
+        else:
+            found.setdefault(pattern, os.path.dirname(pattern))
+    return list(found.items())
+
+
+def output_path(path: str, base: str, out_dir: Optional[str], ext: str) -> str:
+    if out_dir is None:
+        return os.path.splitext(path)[0] + ext
+    rel = os.path.relpath(path, base or ".")
+    return os.path.join(out_dir, os.path.splitext(rel)[0] + ext)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, mode="rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(path: str, manifest: Dict[str, Dict[str, str]]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run_task(
+    task: BatchTask,
+    options: ConvertOptions,
+    skip: str,
+    cache: Optional[ConversionCache] = None,
+) -> BatchResult:
+    """Convert one file in a worker process, errors are returned instead of raised."""
+    result = BatchResult(task.input, task.output, task.size, "converted")
+    start = time.perf_counter()
+    try:
+        if skip == "hash":
+            result.hash = file_hash(task.input)
+            if (
+                result.hash == task.last_hash
+                and task.last_options == options.output_key
+                and os.path.exists(task.output)
+            ):
+                result.status = "skipped"
+                return result
+        result.cached = convert_file(task.input, task.output, options, cache)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        result.status = "failed"
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def _is_fresh(task: BatchTask) -> bool:
+    try:
+        return os.stat(task.output).st_mtime >= os.stat(task.input).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def run_batch(
+    files: List[Tuple[str, str]],
+    out_dir: Optional[str],
+    options: ConvertOptions,
+    jobs: int,
+    skip: str = "mtime",
+    manifest_path: Optional[str] = None,
+    cache: Optional[ConversionCache] = None,
+) -> List[BatchResult]:
+    use_manifest = skip != "none" and manifest_path is not None
+    manifest = load_manifest(manifest_path) if use_manifest else {}  # type: ignore
+    options_key = options.output_key
+
+    planned = [
+        (path, output_path(path, base, out_dir, options.extension))
+        for path, base in files
+    ]
+    outputs: Dict[str, List[str]] = {}
+    for path, output in planned:
+        outputs.setdefault(os.path.abspath(output), []).append(path)
+
+    results: List[BatchResult] = []
+    tasks: List[BatchTask] = []
+    for path, output in planned:
+        others = [p for p in outputs[os.path.abspath(output)] if p != path]
+        if others:
+            error = f"output {output} is also the output of {', '.join(others)}"
+            results.append(BatchResult(path, output, 0, "failed", error=error))
+            continue
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            results.append(BatchResult(path, output, 0, "failed", error=str(e)))
+            continue
+        last = manifest.get(os.path.abspath(path), {})
+        task = BatchTask(path, output, size, last.get("hash"), last.get("options"))
+        # mtime 判断只需要 stat, 在主进程中完成, 不提交给进程池
+        if skip == "mtime" and task.last_options == options_key and _is_fresh(task):
+            results.append(BatchResult(path, output, size, "skipped"))
+            continue
+        tasks.append(task)
+
+    run = functools.partial(run_task, options=options, skip=skip, cache=cache)
+    if jobs <= 1 or len(tasks) <= 1:
+        results.extend(map(run, tasks))
+    else:
+        # 文件多且小, 按块分发减少进程间通信开销
+        chunksize = max(1, min(64, len(tasks) // (jobs * 8)))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results.extend(pool.map(run, tasks, chunksize=chunksize))
+
+    if use_manifest:
+        for r in results:
+            if r.status == "failed":
+                continue
+            entry = manifest.setdefault(os.path.abspath(r.input), {})
+            entry.update(output=r.output, options=options_key)
+            if r.hash:
+                entry["hash"] = r.hash
+            elif r.status == "converted":
+                # mtime 模式不计算 hash, 重新转换后旧的 hash 已失效
+                entry.pop("hash", None)
+        save_manifest(manifest_path, manifest)  # type: ignore
+    if cache is not None:
+        # 各 worker 只写入缓存, 结束后统一按 LRU 淘汰到上限以内
+        cache.prune()
+    return results
+
+
+def print_summary(results: List[BatchResult], elapsed: float, max_errors: int = 20):
+    counts = {"converted": 0, "skipped": 0, "failed": 0}
+    for r in results:
+        counts[r.status] += 1
+    converted = [r for r in results if r.status == "converted"]
+    mb = sum(r.size for r in converted) / (1 << 20)
+    elapsed = max(elapsed, 1e-9)
+
+    print(
+        f"files: {len(results)}, converted: {counts['converted']}, "
+        f"skipped: {counts['skipped']}, failed: {counts['failed']}"
+    )
+    hits = sum(1 for r in converted if r.cached)
+    if hits:
+        print(f"cache hits: {hits}/{len(converted)}")
+    print(
+        f"elapsed: {elapsed:.2f}s, throughput: {len(converted) / elapsed:.1f} files/s, "
+        f"{mb / elapsed:.2f} MB/s"
+    )
+    failed = [r for r in results if r.status == "failed"]
+    for r in failed[:max_errors]:
+        print(f"failed: {r.input}: {r.error}", file=sys.stderr)
+    if len(failed) > max_errors:
+        print(f"... and {len(failed) - max_errors} more failures", file=sys.stderr)
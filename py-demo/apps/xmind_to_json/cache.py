@@ -0,0 +1,128 @@
+import hashlib
+import os
+import shutil
+import time
+import zipfile
+from typing import TYPE_CHECKING, List, Optional, TextIO, Tuple
+
+if TYPE_CHECKING:
+    from converter import ConvertOptions
+
+# 转换结果的磁盘缓存: key 由 content.json/content.xml 成员的 CRC32 和大小 (zip 中央目录中
+# 已有, 不需要解压) 加上输出选项组成. 命中时直接复制缓存的输出, 不解压也不解析.
+# 按修改时间做 LRU: 命中时更新 mtime, prune() 删除最久未使用的文件直到总大小不超过上限.
+
+# 2: --indent 0 输出紧凑格式, key 中加入 json 后端
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "xmind_to_json",
+)
+DEFAULT_CACHE_MB = 1024
+
+
+class TeeWriter:
+    """Writes to the output and the cache file at the same time."""
+
+    def __init__(self, *outs: TextIO):
+        self.outs = outs
+
+    def write(self, s: str) -> int:
+        for out in self.outs:
+            out.write(s)
+        return len(s)
+
+
+class ConversionCache:
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_mb: int = DEFAULT_CACHE_MB):
+        self.root = root
+        self.max_bytes = max_mb << 20
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, info: zipfile.ZipInfo, options: "ConvertOptions") -> str:
+        raw = (
+            f"{CACHE_VERSION}:{info.filename}:{info.CRC:08x}:{info.file_size}:"
+            f"{options.output_key}"
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        # 按 key 前两位分目录, 避免单个目录下文件过多
+        return os.path.join(self.root, key[:2], key + ".out")
+
+    def copy_to(self, key: str, out: TextIO) -> bool:
+        """Copy the cached output to out, return False on a cache miss."""
+        path = self.path(key)
+        try:
+            with open(path, encoding="utf-8", newline="") as f:
+                shutil.copyfileobj(f, out, 1 << 20)  # type: ignore
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # 被其他进程 prune 删除, 本次输出已完成
+            pass
+        self.hits += 1
+        return True
+
+    def open_entry(self, key: str) -> Tuple[TextIO, str]:
+        """Open a temp file for a new entry, pass it to commit() when written."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # newline="" 不转换换行符, 缓存内容与输出逐字节相同 (csv 使用 \r\n)
+        return open(tmp_path, mode="w", encoding="utf-8", newline=""), tmp_path
+
+    def commit(self, key: str, tmp_path: str):
+        os.replace(tmp_path, self.path(key))
+
+    def discard(self, tmp_path: str):
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    def prune(self) -> int:
+        """Delete least recently used entries until the cache fits max size, return count."""
+        entries: List[Tuple[float, int, str]] = []
+        total = 0
+        now = time.time()
+        if not os.path.isdir(self.root):
+            return 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                st = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    # 中断的写入留下的临时文件
+                    if now - st.st_mtime > 3600:
+                        os.unlink(entry.path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def content_info(zf: zipfile.ZipFile) -> Optional[zipfile.ZipInfo]:
+    """ZipInfo of content.json (preferred) or content.xml, None if neither exists."""
+    for name in ("content.json", "content.xml"):
+        try:
+            return zf.getinfo(name)
+        except KeyError:
+            continue
+    return None
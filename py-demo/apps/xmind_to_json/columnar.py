@@ -0,0 +1,106 @@
+import csv
+from typing import IO, Any, Dict, List, Optional, TextIO
+
+from xml_stream import TopicEvent, XmindHandler
+
+# 扁平的表格导出: 每个 topic 一行 (id, parent_id, depth, sheet, title, notes, labels),
+# 直接由解析事件生成, 不构建嵌套树. parquet/arrow 按批写入, 内存与节点总数无关.
+# id 按文档顺序 (先序) 分配, 行按 topic 结束的顺序 (子节点先于父节点) 写出.
+# sheet 为 sheet 序号: content.xml 中 sheet 标题可能位于 topic 之后, 写行时尚未解析到.
+
+TABLE_COLUMNS = ("id", "parent_id", "depth", "sheet", "title", "notes", "labels")
+TABLE_FORMATS = ("csv", "parquet", "arrow")
+# csv 中多个 label 的分隔符
+LABEL_SEPARATOR = ";"
+
+
+def _import_pyarrow(fmt: str):
+    # pyarrow 是可选依赖 (uv sync --extra columnar), 只在写 parquet/arrow 时导入
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ValueError(
+            f"{fmt} output requires pyarrow, install it with: uv sync --extra columnar"
+        ) from e
+    return pyarrow
+
+
+class CsvTableWriter(XmindHandler):
+
+    def __init__(self, out: TextIO):
+        self._writer = csv.writer(out)
+
+    def start_document(self):
+        self._writer.writerow(TABLE_COLUMNS)
+
+    def end_topic(self, topic: TopicEvent):
+        self._writer.writerow(
+            (
+                topic.id,
+                "" if topic.parent_id is None else topic.parent_id,
+                topic.depth,
+                topic.sheet,
+                topic.title or "",
+                topic.notes or "",
+                LABEL_SEPARATOR.join(topic.labels),
+            )
+        )
+
+
+class ArrowTableWriter(XmindHandler):
+    """Writes parquet or arrow IPC files in record batches of batch_size rows."""
+
+    def __init__(self, out: IO[bytes], fmt: str = "parquet", batch_size: int = 65536):
+        pa = _import_pyarrow(fmt)
+        self.out = out
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._pa = pa
+        self.schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("parent_id", pa.int64()),
+                ("depth", pa.int32()),
+                ("sheet", pa.int32()),
+                ("title", pa.string()),
+                ("notes", pa.string()),
+                ("labels", pa.list_(pa.string())),
+            ]
+        )
+        self._columns: Dict[str, List[Any]] = {name: [] for name in TABLE_COLUMNS}
+        self._writer: Optional[Any] = None
+
+    def start_document(self):
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self.out, self.schema)
+        else:
+            import pyarrow.ipc as pa_ipc
+
+            self._writer = pa_ipc.new_file(self.out, self.schema)
+
+    def end_topic(self, topic: TopicEvent):
+        columns = self._columns
+        columns["id"].append(topic.id)
+        columns["parent_id"].append(topic.parent_id)
+        columns["depth"].append(topic.depth)
+        columns["sheet"].append(topic.sheet)
+        columns["title"].append(topic.title)
+        columns["notes"].append(topic.notes)
+        columns["labels"].append(topic.labels)
+        if len(columns["id"]) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._columns["id"]:
+            return
+        batch = self._pa.record_batch(
+            [self._columns[name] for name in TABLE_COLUMNS], schema=self.schema
+        )
+        self._writer.write_batch(batch)
+        self._columns = {name: [] for name in TABLE_COLUMNS}
+
+    def end_document(self):
+        self._flush()
+        self._writer.close()
@@ -0,0 +1,234 @@
+import dataclasses
+import io
+import os
+import sys
+import zipfile
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from cache import ConversionCache, TeeWriter, content_info
+from columnar import TABLE_FORMATS, ArrowTableWriter, CsvTableWriter
+from json_backend import get_backend
+from stream_writer import JsonStreamWriter, NdjsonWriter
+from xml_stream import TreeBuilder, XmindHandler, XmindStreamParser, parse_xml_stream
+from zen_json import iter_json_array, walk_sheets
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ConvertOptions:
+    # json / ndjson / csv / parquet / arrow, json 以外的格式总是流式输出
+    fmt: str = "json"
+    stream: bool = False
+    # indent 为 0 时输出紧凑格式
+    indent: int = 2
+    # auto / orjson / msgspec / json, 见 json_backend.get_backend
+    json_backend: str = "auto"
+
+    @property
+    def streaming(self) -> bool:
+        return self.stream or self.fmt != "json"
+
+    @property
+    def binary(self) -> bool:
+        return self.fmt in ("parquet", "arrow")
+
+    @property
+    def extension(self) -> str:
+        return f".{self.fmt}"
+
+    @property
+    def output_key(self) -> str:
+        """The options that change the output, for cache keys and batch skip checks."""
+        return (
+            f"{self.fmt}:{self.streaming}:{self.indent}:"
+            f"{get_backend(self.json_backend).name}"
+        )
+
+
+def parse_xml_content(xml_bytes: bytes) -> Any:
+    """Parse the legacy XML content.xml into a list of sheets."""
+    return parse_xml_stream(io.BytesIO(xml_bytes))
+
+
+def _no_content_error(names: List[str]) -> ValueError:
+    return ValueError(
+        f"Not a valid XMind file - no content.json or content.xml found.\n"
+        f"Archive contains: {names}"
+    )
+
+
+def _too_deep_error(e: RecursionError) -> ValueError:
+    return ValueError(
+        f"content.json is nested too deeply to decode ({e}), the json parser is "
+        f"recursive and limited to about {sys.getrecursionlimit()} levels"
+    )
+
+
+def _content_member(xmind_path: str) -> Optional[str]:
+    with zipfile.ZipFile(xmind_path, mode="r") as zf:
+        names = zf.namelist()
+    for name in ("content.json", "content.xml"):
+        if name in names:
+            return name
+    return None
+
+
+def xmind_to_json(xmind_path: str, json_backend: str = "auto") -> Any:
+    """
+    Open an .xmind file and return its content as a Python object (list of sheets).
+    """
+    with zipfile.ZipFile(xmind_path, mode="r") as zf:
+        names = zf.namelist()
+
+        # Prefer the JSON format (XMind Zen / XMind 8+)
+        if "content.json" in names:
+            raw = zf.read("content.json")
+            try:
+                return get_backend(json_backend).loads(raw)
+            except RecursionError as e:
+                raise _too_deep_error(e) from e
+
+        # Fall back to XML format (older XMind)
+        # 直接从 zip 成员流增量解析, 不把整个 content.xml 读入内存
+        if "content.xml" in names:
+            with zf.open("content.xml") as f:
+                return parse_xml_stream(f)
+
+        raise _no_content_error(names)
+
+
+def iter_sheets(xmind_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the sheets of an .xmind file one at a time, parsing only as far as the caller reads.
+    """
+    with zipfile.ZipFile(xmind_path, mode="r") as zf:
+        names = zf.namelist()
+
+        if "content.json" in names:
+            with zf.open("content.json") as f:
+                try:
+                    yield from iter_json_array(f)
+                except RecursionError as e:
+                    raise _too_deep_error(e) from e
+            return
+
+        if "content.xml" in names:
+            builder = TreeBuilder()
+            with zf.open("content.xml") as f:
+                for _ in XmindStreamParser(builder).iter_parse(f):
+                    yield builder.sheets.pop()
+            return
+
+        raise _no_content_error(names)
+
+
+def stream_xmind(xmind_path: str, handler: XmindHandler):
+    """
+    Parse an .xmind file and feed sheets and topics to handler as they are parsed.
+    """
+    with zipfile.ZipFile(xmind_path, mode="r") as zf:
+        names = zf.namelist()
+
+        if "content.json" in names:
+            # content.json 逐个 sheet 解码, 之后按相同的事件输出
+            with zf.open("content.json") as f:
+                try:
+                    walk_sheets(iter_json_array(f), handler)
+                except RecursionError as e:
+                    raise _too_deep_error(e) from e
+            return
+
+        if "content.xml" in names:
+            with zf.open("content.xml") as f:
+                XmindStreamParser(handler).parse(f)
+            return
+
+        raise _no_content_error(names)
+
+
+def _convert(xmind_path: str, out: IO[Any], options: ConvertOptions):
+    if options.fmt in TABLE_FORMATS:
+        if options.binary:
+            handler: XmindHandler = ArrowTableWriter(out, options.fmt)
+        else:
+            handler = CsvTableWriter(out)
+        stream_xmind(xmind_path, handler)
+        return
+
+    if options.streaming:
+        writer_cls = NdjsonWriter if options.fmt == "ndjson" else JsonStreamWriter
+        stream_xmind(xmind_path, writer_cls(out))
+        return
+
+    backend = get_backend(options.json_backend)
+    data = xmind_to_json(xmind_path, backend.name)
+    try:
+        text = backend.dumps(data, options.indent)
+    except RecursionError as e:
+        if _content_member(xmind_path) != "content.xml":
+            raise _too_deep_error(e) from e
+        # content.xml 的树由 TreeBuilder 非递归构建, 只有序列化超过递归上限;
+        # 改用流式写出 (显式栈), 结构与非流式输出相同, 但为紧凑格式
+        del data
+        stream_xmind(xmind_path, JsonStreamWriter(out))
+        return
+    out.write(text)
+
+
+def convert(
+    xmind_path: str,
+    out: IO[Any],
+    options: ConvertOptions,
+    cache: Optional[ConversionCache] = None,
+) -> bool:
+    """Convert one .xmind file and write the result to out, return True on a cache hit."""
+    # 缓存只保存文本输出, parquet/arrow 不经过缓存
+    if cache is None or options.binary:
+        _convert(xmind_path, out, options)
+        return False
+
+    # 只读取 zip 中央目录拿到 CRC/大小, 命中时不解压 content
+    with zipfile.ZipFile(xmind_path, mode="r") as zf:
+        info = content_info(zf)
+    if info is None:
+        _convert(xmind_path, out, options)
+        return False
+
+    key = cache.key(info, options)
+    if cache.copy_to(key, out):
+        return True
+
+    entry, tmp_path = cache.open_entry(key)
+    try:
+        with entry:
+            _convert(xmind_path, TeeWriter(out, entry), options)  # type: ignore
+        cache.commit(key, tmp_path)
+    except BaseException:
+        cache.discard(tmp_path)
+        raise
+    return False
+
+
+def convert_file(
+    xmind_path: str,
+    output_path: str,
+    options: ConvertOptions,
+    cache: Optional[ConversionCache] = None,
+) -> bool:
+    """Convert to output_path, written to a temp file first and renamed when done."""
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(out_dir, exist_ok=True)
+    # 中断或失败时不会留下不完整的输出文件 (否则会被 mtime 判断为已转换)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        if options.binary:
+            f = open(tmp_path, mode="wb")
+        else:
+            f = open(tmp_path, mode="w", encoding="utf-8", newline="")
+        with f:
+            cached = convert(xmind_path, f, options, cache)
+        os.replace(tmp_path, output_path)
+        return cached
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,97 @@
+import json
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore
+
+# content.json 的解析和输出的序列化: 优先 orjson, 其次 msgspec, 都没有时使用标准库 json.
+# orjson 只支持紧凑和 2 空格缩进, 嵌套超过 255 层时报错; 这些情况回退到标准库, 输出不变.
+# 标准库 json 是递归实现, 嵌套超过解释器递归上限 (约 1000 层) 时同样失败, 抛出 RecursionError,
+# 由调用方处理 (见 converter._convert).
+# indent 为 0 时输出紧凑格式 (无换行和空格), 不做格式化.
+
+BACKENDS = ("auto", "orjson", "msgspec", "json")
+
+
+class JsonBackend:
+    """loads() / dumps() of the standard library json module."""
+
+    name = "json"
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+    def dumps(self, value: Any, indent: int = 0) -> str:
+        if indent <= 0:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(value, ensure_ascii=False, indent=indent)
+
+
+class OrjsonBackend(JsonBackend):
+
+    name = "orjson"
+
+    def loads(self, raw: bytes) -> Any:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # 包括嵌套过深, 由标准库重新解析 (无效的 JSON 在这里报错)
+            return super().loads(raw)
+
+    def dumps(self, value: Any, indent: int = 0) -> str:
+        if indent not in (0, 2):
+            return super().dumps(value, indent)
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        try:
+            return orjson.dumps(value, option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return super().dumps(value, indent)
+
+
+class MsgspecBackend(JsonBackend):
+
+    name = "msgspec"
+
+    def loads(self, raw: bytes) -> Any:
+        try:
+            return msgspec.json.decode(raw)
+        except msgspec.DecodeError:
+            return super().loads(raw)
+
+    def dumps(self, value: Any, indent: int = 0) -> str:
+        try:
+            raw = msgspec.json.encode(value)
+        except msgspec.EncodeError:
+            return super().dumps(value, indent)
+        if indent > 0:
+            raw = msgspec.json.format(raw, indent=indent)
+        return raw.decode("utf-8")
+
+
+_instances: Dict[str, JsonBackend] = {}
+
+
+def get_backend(name: Optional[str] = "auto") -> JsonBackend:
+    """Backend by name, "auto" picks the fastest one installed."""
+    name = name or "auto"
+    if name == "auto":
+        name = "orjson" if orjson else "msgspec" if msgspec else "json"
+    if name == "orjson" and orjson is None:
+        raise ValueError("json backend orjson is not installed")
+    if name == "msgspec" and msgspec is None:
+        raise ValueError("json backend msgspec is not installed")
+
+    backend = _instances.get(name)
+    if backend is None:
+        cls = {"orjson": OrjsonBackend, "msgspec": MsgspecBackend}.get(
+            name, JsonBackend
+        )
+        backend = _instances[name] = cls()
+    return backend
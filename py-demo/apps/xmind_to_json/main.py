@@ -1,122 +1,202 @@
 import argparse
-import json
+import os
 import sys
-import xml.etree.ElementTree as ET
+import time
 import zipfile
-from typing import Any
+from typing import Optional
 
-XMIND_NS = {
-    "xmind": "urn:xmind:xmap:xmlns:content:2.0",
-}
+from batch import MANIFEST_NAME, expand_inputs, is_batch_input, print_summary, run_batch
+from cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MB, ConversionCache
+from columnar import TABLE_FORMATS
+from converter import ConvertOptions, convert, iter_sheets
+from json_backend import BACKENDS
 
 
-def _parse_topic(topic_el: ET.Element) -> dict:
-    """Recursively parse an XML <topic> element into a dict."""
-    node = {}
+def new_cache(args: argparse.Namespace) -> Optional[ConversionCache]:
+    if args.no_cache:
+        return None
+    return ConversionCache(args.cache_dir, args.cache_size)
 
-    # Title
-    title_el = topic_el.find("xmind:title", XMIND_NS)
-    if title_el is not None and title_el.text:
-        node["title"] = title_el.text
 
-    # Notes (plain text)
-    notes_el = topic_el.find(".//xmind:notes/xmind:plain", XMIND_NS)
-    if notes_el is not None and notes_el.text:
-        node["notes"] = notes_el.text
-
-    # Labels
-    labels = [
-        lbl.text
-        for lbl in topic_el.findall("xmind:labels/xmind:label", XMIND_NS)
-        if lbl.text
-    ]
-    if labels:
-        node["labels"] = labels
-
-    # Children (subtopics)
-    children_el = topic_el.find("xmind:children/xmind:topics", XMIND_NS)
-    if children_el is not None:
-        children = [
-            _parse_topic(t) for t in children_el.findall("xmind:topic", XMIND_NS)
-        ]
-        if children:
-            node["children"] = children
-
-    return node
-
-
-def parse_xml_content(xml_bytes: bytes) -> Any:
-    """Parse the legacy XML content.xml into a list of sheets."""
-    root = ET.fromstring(xml_bytes)
-
-    sheets = []
-    for sheet_el in root.findall("xmind:sheet", XMIND_NS):
-        sheet = {}
-        title_el = sheet_el.find("xmind:title", XMIND_NS)
-        if title_el is not None:
-            sheet["title"] = title_el.text
-
-        root_topic = sheet_el.find("xmind:topic", XMIND_NS)
-        if root_topic is not None:
-            sheet["rootTopic"] = _parse_topic(root_topic)
+def convert_one(args: argparse.Namespace, options: ConvertOptions):
+    if options.binary and not args.output:
+        print(f"Error: --format {options.fmt} requires -o", file=sys.stderr)
+        sys.exit(1)
 
-        sheets.append(sheet)
+    if not args.output:
+        out = sys.stdout
+    elif options.binary:
+        out = open(args.output, mode="wb")
+    else:
+        out = open(args.output, mode="w", encoding="utf-8", newline="")
+    try:
+        if not args.output and not options.streaming:
+            print("Xmind json:")
+        cache = new_cache(args)
+        convert(args.inputs[0], out, options, cache)
+        if cache is not None:
+            cache.prune()
+        if not args.output and not options.streaming:
+            out.write("\n")
+    except BrokenPipeError:
+        # 输出管道被提前关闭 (如 | head), 安静退出: stdout 指向 devnull,
+        # 避免解释器退出时 flush stdout 再次报错 (见 python 文档 signal 一节)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    except (zipfile.BadZipFile, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexcpected exception: {e}")
+        sys.exit(1)
+    finally:
+        if args.output:
+            out.close()
 
-    return sheets
+    if args.output:
+        print(f"Dump to {args.output}")
 
 
-def xmind_to_json(xmind_path: str) -> Any:
-    """
-    Open an .xmind file and return its content as a Python object (list of sheets).
-    """
-    with zipfile.ZipFile(xmind_path, mode="r") as zf:
-        names = zf.namelist()
+def list_sheets(path: str):
+    # 逐个 sheet 解析, 只保留标题
+    try:
+        for index, sheet in enumerate(iter_sheets(path)):
+            print(f"{index}\t{sheet.get('title') or ''}")
+    except (zipfile.BadZipFile, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
-        # Prefer the JSON format (XMind Zen / XMind 8+)
-        if "content.json" in names:
-            raw = zf.read("content.json")
-            return json.loads(raw)
 
-        # Fall back to XML format (older XMind)
-        if "content.xml" in names:
-            raw = zf.read("content.xml")
-            return parse_xml_content(raw)
+def convert_batch(args: argparse.Namespace, options: ConvertOptions):
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("Error: no .xmind files found", file=sys.stderr)
+        sys.exit(1)
 
-        raise ValueError(
-            f"Not a valid XMind file - no content.json or content.xml found.\n"
-            f"Archive contains: {names}"
-        )
+    manifest = args.manifest or os.path.join(args.output or ".", MANIFEST_NAME)
+    print(f"convert {len(files)} files with {args.jobs} workers")
+    start = time.perf_counter()
+    results = run_batch(
+        files,
+        args.output,
+        options,
+        jobs=args.jobs,
+        skip=args.skip,
+        manifest_path=manifest,
+        cache=new_cache(args),
+    )
+    print_summary(results, time.perf_counter() - start)
+    if any(r.status == "failed" for r in results):
+        sys.exit(1)
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Convert an XMind file to JSON.")
-    parser.add_argument("xmind_file", type=str, help="Path to the .xmind file")
+    parser = argparse.ArgumentParser(description="Convert XMind files to JSON.")
     parser.add_argument(
-        "-o", "--output", type=str, help="Output JSON file (default: stdout)"
+        "inputs",
+        nargs="+",
+        metavar="xmind_file",
+        help="Path to the .xmind file, or directories / glob patterns for batch mode",
     )
     parser.add_argument(
-        "--indent", type=int, default=2, help="JSON indent level (default: 2)"
+        "-o",
+        "--output",
+        type=str,
+        help="Output JSON file (default: stdout), output directory in batch mode "
+        "(default: next to each input)",
+    )
+    parser.add_argument(
+        "--indent",
+        type=int,
+        default=2,
+        help="JSON indent level (default: 2), 0 for compact output",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write topics incrementally while parsing (compact, --indent is ignored); "
+        "the output is the normalized title/notes/labels/children tree, also for "
+        "content.json which is otherwise written as the raw document",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "ndjson") + TABLE_FORMATS,
+        default="json",
+        help="output format, ndjson (one topic per line) is always streamed; "
+        "csv/parquet/arrow write a flat table of topics "
+        "(id, parent_id, depth, sheet, title, notes, labels)",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=BACKENDS,
+        default="auto",
+        help="JSON library to parse content.json and write json output "
+        "(default: auto, orjson > msgspec > json)",
+    )
+    parser.add_argument(
+        "--list-sheets",
+        action="store_true",
+        help="print the index and title of each sheet instead of converting",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes in batch mode (default: cpu count)",
+    )
+    parser.add_argument(
+        "--skip",
+        choices=("mtime", "hash", "none"),
+        default="mtime",
+        help="batch mode: skip files whose output is newer than the input (mtime), "
+        "or whose content hash is unchanged in the manifest (hash); files last "
+        "converted with other output options are never skipped",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="manifest of input hashes and output options used by --skip "
+        f"(default: <output dir>/{MANIFEST_NAME})",
     )
 
-    args = parser.parse_args()
-    try:
-        data = xmind_to_json(args.xmind_file)
-    except (zipfile.BadZipFile, ValueError) as e:
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Unexcpected exception: {e}")
-        sys.exit(1)
-
-    json_str = json.dumps(data, indent=args.indent, ensure_ascii=False)
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"conversion cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_MB,
+        help=f"cache size limit in MB, least recently used entries are evicted "
+        f"(default: {DEFAULT_CACHE_MB})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the conversion cache"
+    )
 
-    if args.output:
-        with open(args.output, mode="w", encoding="utf-8") as f:
-            f.write(json_str)
-        print(f"Dump to {args.output}")
+    args = parser.parse_args()
+    options = ConvertOptions(
+        fmt=args.format,
+        stream=args.stream,
+        indent=args.indent,
+        json_backend=args.json_backend,
+    )
+    if args.list_sheets:
+        files = expand_inputs(args.inputs)
+        for path, _ in files:
+            if len(files) > 1:
+                print(f"{path}:")
+            list_sheets(path)
+        return
+
+    if len(args.inputs) > 1 or is_batch_input(args.inputs[0]):
+        convert_batch(args, options)
     else:
-        print("Xmind json:")
-        print(json_str)
+        convert_one(args, options)
 
 
 if __name__ == "__main__":
@@ -124,5 +204,13 @@ if __name__ == "__main__":
     # cd apps/xmind_to_json
     # uv run main.py input.xmind
     # uv run main.py input.xmind -o output.json
+    # uv run main.py input.xmind --stream
+    # uv run main.py input.xmind --indent 0 --json-backend orjson
+    # uv run main.py input.xmind --list-sheets
+    # uv run main.py input.xmind --format ndjson | head
+    # uv run main.py input.xmind --format csv -o topics.csv
+    # uv run --extra columnar main.py input.xmind --format parquet -o topics.parquet
+    # uv run main.py maps/ -o out/ -j 8
+    # uv run main.py "maps/**/*.xmind" -o out/ --skip hash
 
     main()
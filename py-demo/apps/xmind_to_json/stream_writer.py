@@ -0,0 +1,131 @@
+import json
+from typing import Any, List, Optional, Set, TextIO, Tuple
+
+from xml_stream import TopicEvent, XmindHandler
+
+# 流式输出: 解析过程中逐个 topic 写出, 不构建完整的树, 也不生成完整的 JSON 字符串.
+# topic 在结束时才确定 notes/labels (XML 中可能位于 children 之后), 因此:
+# - ndjson: 每个 topic 结束时写一行 (子节点先于父节点), 每个 sheet 结束时写一行 sheet 记录
+# - json: 嵌套 JSON (紧凑格式), 第一个子节点出现时写出父节点已知的字段
+#   结构为规范化的 title/notes/labels/children 树: content.xml 与非流式输出相同;
+#   content.json (Zen) 的非流式输出是原始文档, 流式输出只保留这几个字段
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def topic_fields(topic: TopicEvent) -> List[Tuple[str, Any]]:
+    fields: List[Tuple[str, Any]] = []
+    if topic.title:
+        fields.append(("title", topic.title))
+    if topic.notes:
+        fields.append(("notes", topic.notes))
+    if topic.labels:
+        fields.append(("labels", topic.labels))
+    return fields
+
+
+class NdjsonWriter(XmindHandler):
+    """One JSON object per line: a "topic" record per topic, a "sheet" record per sheet."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._sheet_title: Optional[str] = None
+
+    def start_sheet(self, index: int):
+        self._sheet_title = None
+
+    def sheet_title(self, index: int, title: Optional[str]):
+        self._sheet_title = title
+
+    def end_topic(self, topic: TopicEvent):
+        record = {
+            "type": "topic",
+            "sheet": topic.sheet,
+            "id": topic.id,
+            "parent_id": topic.parent_id,
+            "depth": topic.depth,
+            "path": topic.path,
+            **dict(topic_fields(topic)),
+        }
+        self.out.write(_dumps(record) + "\n")
+
+    def end_sheet(self, index: int):
+        record = {"type": "sheet", "sheet": index, "title": self._sheet_title}
+        self.out.write(_dumps(record) + "\n")
+
+
+class _OpenTopic:
+    __slots__ = ("opened", "children", "written")
+
+    def __init__(self):
+        # 是否已写出 "{...,"children":[" 头部
+        self.opened = False
+        self.children = 0
+        self.written: Set[str] = set()
+
+
+class JsonStreamWriter(XmindHandler):
+    """
+    Nested JSON of title/notes/labels/children, written incrementally.
+
+    Same shape as the non-stream output for content.xml. For Zen content.json the
+    non-stream output is the raw document, this writes the normalized tree instead.
+    """
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._sheets = 0
+        self._sheet_keys = 0
+        self._stack: List[_OpenTopic] = []
+
+    def start_document(self):
+        self.out.write("[")
+
+    def end_document(self):
+        self.out.write("]\n")
+
+    def _sheet_key(self, key: str):
+        self.out.write(("," if self._sheet_keys else "") + _dumps(key) + ":")
+        self._sheet_keys += 1
+
+    def start_sheet(self, index: int):
+        self.out.write(("," if self._sheets else "") + "{")
+        self._sheets += 1
+        self._sheet_keys = 0
+
+    def sheet_title(self, index: int, title: Optional[str]):
+        self._sheet_key("title")
+        self.out.write(_dumps(title))
+
+    def end_sheet(self, index: int):
+        self.out.write("}")
+
+    def start_topic(self, topic: TopicEvent):
+        if not self._stack:
+            self._sheet_key("rootTopic")
+        else:
+            parent = self._stack[-1]
+            if parent.opened:
+                self.out.write(",")
+            else:
+                self._open(parent, topic.parent)
+            parent.children += 1
+        self._stack.append(_OpenTopic())
+
+    def _open(self, state: _OpenTopic, topic: Optional[TopicEvent]):
+        fields = topic_fields(topic) if topic else []
+        parts = [f"{_dumps(k)}:{_dumps(v)}" for k, v in fields]
+        self.out.write("{" + "".join(p + "," for p in parts) + '"children":[')
+        state.opened = True
+        state.written = {k for k, _ in fields}
+
+    def end_topic(self, topic: TopicEvent):
+        state = self._stack.pop()
+        rest = [(k, v) for k, v in topic_fields(topic) if k not in state.written]
+        parts = [f"{_dumps(k)}:{_dumps(v)}" for k, v in rest]
+        if state.opened:
+            self.out.write("]" + "".join("," + p for p in parts) + "}")
+        else:
+            self.out.write("{" + ",".join(parts) + "}")
@@ -0,0 +1,233 @@
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+# 旧版 XMind content.xml 的流式解析: iterparse 增量读取 (可直接读 zip 成员流),
+# 用显式栈代替递归, 元素处理完立即 clear 并从父节点移除, 内存只与树的深度有关.
+# 解析结果通过 XmindHandler 回调输出, TreeBuilder 构建与原来相同的嵌套 dict.
+
+XMIND_NS_URI = "urn:xmind:xmap:xmlns:content:2.0"
+
+
+def _local(tag: str) -> str:
+    # "{urn:xmind:...}topic" -> "topic", 非 xmind 命名空间的元素返回空串
+    if tag.startswith("{"):
+        ns, _, name = tag[1:].partition("}")
+        return name if ns == XMIND_NS_URI else ""
+    return tag
+
+
+class TopicEvent:
+    """A topic being parsed. Fields other than ids/depth are complete at end_topic."""
+
+    __slots__ = (
+        "id",
+        "parent_id",
+        "depth",
+        "sheet",
+        "title",
+        "notes",
+        "labels",
+        "parent",
+        "_groups",
+    )
+
+    def __init__(self, node_id: int, parent: Optional["TopicEvent"], sheet: int):
+        self.id = node_id
+        self.parent = parent
+        self.parent_id = parent.id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.sheet = sheet
+        self.title: Optional[str] = None
+        self.notes: Optional[str] = None
+        self.labels: List[str] = []
+        # children 下出现过的 <topics> 分组数, 只解析第一组
+        self._groups = 0
+
+    @property
+    def path(self) -> List[Optional[str]]:
+        """Titles of the ancestor topics, root first. Built on demand, O(depth)."""
+        titles = []
+        node = self.parent
+        while node is not None:
+            titles.append(node.title)
+            node = node.parent
+        titles.reverse()
+        return titles
+
+
+class XmindHandler:
+    """Callbacks of XmindStreamParser, subclasses override the ones they need."""
+
+    def start_document(self):
+        pass
+
+    def end_document(self):
+        pass
+
+    def start_sheet(self, index: int):
+        pass
+
+    def sheet_title(self, index: int, title: Optional[str]):
+        pass
+
+    def end_sheet(self, index: int):
+        pass
+
+    def start_topic(self, topic: TopicEvent):
+        pass
+
+    def end_topic(self, topic: TopicEvent):
+        pass
+
+
+class XmindStreamParser:
+    """Incremental parser for content.xml, drives a XmindHandler."""
+
+    def __init__(self, handler: XmindHandler):
+        self.handler = handler
+
+    def parse(self, source: IO[bytes]):
+        for _ in self.iter_parse(source):
+            pass
+
+    def iter_parse(self, source: IO[bytes]) -> Iterator[int]:
+        """Parse like parse(), pausing after each sheet to yield its index."""
+        handler = self.handler
+        elems: List[ET.Element] = []
+        tags: List[str] = []
+        topics: List[TopicEvent] = []
+        sheet = -1
+        has_root = False
+        next_id = 0
+        # 正在跳过的子树 (非第一组 topics 等), 其根元素在 elems 中的位置
+        skip_depth: Optional[int] = None
+
+        handler.start_document()
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                tag = _local(elem.tag)
+                parent = tags[-1] if tags else None
+                elems.append(elem)
+                tags.append(tag)
+                if skip_depth is not None:
+                    continue
+
+                if tag == "sheet" and parent == "xmap-content":
+                    sheet += 1
+                    has_root = False
+                    handler.start_sheet(sheet)
+                elif tag == "topics" and parent == "children" and topics:
+                    owner = topics[-1]
+                    owner._groups += 1
+                    if owner._groups > 1:
+                        skip_depth = len(elems) - 1
+                elif tag == "topic":
+                    if parent == "sheet" and not has_root:
+                        # sheet 下的第一个 topic 作为 rootTopic
+                        has_root = True
+                    elif not (
+                        parent == "topics" and tags[-4:-2] == ["topic", "children"]
+                    ):
+                        # 不在 topic/children/topics 下的 topic 元素不解析
+                        skip_depth = len(elems) - 1
+                        continue
+                    topic = TopicEvent(next_id, topics[-1] if topics else None, sheet)
+                    next_id += 1
+                    topics.append(topic)
+                    handler.start_topic(topic)
+                continue
+
+            # end event
+            tag = tags.pop()
+            elems.pop()
+            sheet_done = False
+            if skip_depth is not None:
+                if len(elems) == skip_depth:
+                    skip_depth = None
+            else:
+                sheet_done = self._on_end(tag, tags, elem, topics, sheet)
+
+            # 已处理的元素释放: 清空内容并从父元素移除, 父元素不再持有子树
+            elem.clear()
+            if elems:
+                elems[-1].remove(elem)
+            if sheet_done:
+                yield sheet
+        handler.end_document()
+
+    def _on_end(
+        self,
+        tag: str,
+        tags: List[str],
+        elem: ET.Element,
+        topics: List[TopicEvent],
+        sheet: int,
+    ) -> bool:
+        """Handle the end of an element, return True when it closes a sheet."""
+        # 未跳过的 <topic> 都在 topics 栈中, 父元素为 topic 时即 topics[-1]
+        parent = tags[-1] if tags else None
+        if tag == "topic":
+            self.handler.end_topic(topics.pop())
+        elif tag == "title" and parent == "topic":
+            if elem.text and topics[-1].title is None:
+                topics[-1].title = elem.text
+        elif tag == "title" and parent == "sheet":
+            self.handler.sheet_title(sheet, elem.text)
+        elif tag == "plain" and parent == "notes" and tags[-2:-1] == ["topic"]:
+            if elem.text:
+                topics[-1].notes = elem.text
+        elif tag == "label" and parent == "labels" and tags[-2:-1] == ["topic"]:
+            if elem.text:
+                topics[-1].labels.append(elem.text)
+        elif tag == "sheet" and parent == "xmap-content":
+            self.handler.end_sheet(sheet)
+            return True
+        return False
+
+
+class TreeBuilder(XmindHandler):
+    """Builds the list of sheets as nested dicts (title, notes, labels, children)."""
+
+    def __init__(self):
+        self.sheets: List[Dict[str, Any]] = []
+        self._sheet: Dict[str, Any] = {}
+        # 栈中每项为未完成 topic 的子节点列表
+        self._children: List[List[Dict[str, Any]]] = []
+
+    def start_sheet(self, index: int):
+        self._sheet = {}
+
+    def sheet_title(self, index: int, title: Optional[str]):
+        self._sheet["title"] = title
+
+    def end_sheet(self, index: int):
+        # sheet 的 title 在 XML 中可能位于 topic 之后, 这里固定 title 在前
+        sheet = {k: self._sheet[k] for k in ("title", "rootTopic") if k in self._sheet}
+        self.sheets.append(sheet)
+
+    def start_topic(self, topic: TopicEvent):
+        self._children.append([])
+
+    def end_topic(self, topic: TopicEvent):
+        children = self._children.pop()
+        node: Dict[str, Any] = {}
+        if topic.title:
+            node["title"] = topic.title
+        if topic.notes:
+            node["notes"] = topic.notes
+        if topic.labels:
+            node["labels"] = topic.labels
+        if children:
+            node["children"] = children
+
+        if self._children:
+            self._children[-1].append(node)
+        else:
+            self._sheet["rootTopic"] = node
+
+
+def parse_xml_stream(source: IO[bytes]) -> List[Dict[str, Any]]:
+    """Parse content.xml from a binary stream into a list of sheets."""
+    builder = TreeBuilder()
+    XmindStreamParser(builder).parse(source)
+    return builder.sheets
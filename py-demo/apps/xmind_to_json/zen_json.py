@@ -0,0 +1,116 @@
+import codecs
+import itertools
+import json
+import re
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xml_stream import TopicEvent, XmindHandler
+
+# XMind Zen (content.json) 的 sheet 列表按与 content.xml 相同的事件驱动 XmindHandler,
+# 用显式栈遍历, 深层级的 topic 树不会触发递归限制.
+# iter_json_array 按块读取顶层数组, 每次只解码一个 sheet, 调用方提前停止时不读取后续内容.
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _children(topic: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # 只取 attached 子节点, 与 content.xml 只解析第一组 topics 一致
+    children = topic.get("children") or {}
+    return children.get("attached") or []
+
+
+def _notes(topic: Dict[str, Any]) -> Optional[str]:
+    notes = topic.get("notes") or {}
+    plain = notes.get("plain") or {}
+    return plain.get("content") or None
+
+
+def _open_topic(
+    topic: Dict[str, Any], event: TopicEvent, handler: XmindHandler
+) -> Tuple[TopicEvent, Iterator[Dict[str, Any]]]:
+    event.title = topic.get("title") or None
+    event.notes = _notes(topic)
+    event.labels = [label for label in topic.get("labels") or [] if label]
+    handler.start_topic(event)
+    return event, iter(_children(topic))
+
+
+def iter_json_array(source: IO[bytes], chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Decode the items of a top-level JSON array one at a time from a binary stream."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buf, pos, eof
+        # 每次至少读入与未处理部分等长的数据, 大的 sheet 重复解码的总量为 O(n)
+        chunk = source.read(max(chunk_size, len(buf) - pos))
+        eof = not chunk
+        buf = buf[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()  # type: ignore
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            read_more()
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+        after = _WHITESPACE.match(buf, end).end()  # type: ignore
+        if not eof and (after == len(buf) or buf[after] not in ",]"):
+            # 值之后还没有读到分隔符, 可能是被块边界截断的数字 (如 "2." / "2.5e"),
+            # 读入更多数据后重新解码
+            read_more()
+            continue
+        pos = end
+        yield value
+
+        sep = next_char()
+        pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {sep!r}")
+        next_char()
+
+
+def walk_sheets(sheets: Iterable[Dict[str, Any]], handler: XmindHandler):
+    """Drive handler with the sheets of a content.json document."""
+    ids = itertools.count()
+    handler.start_document()
+    for index, sheet in enumerate(sheets):
+        handler.start_sheet(index)
+        handler.sheet_title(index, sheet.get("title"))
+        root = sheet.get("rootTopic")
+        if root is not None:
+            stack = [_open_topic(root, TopicEvent(next(ids), None, index), handler)]
+            while stack:
+                event, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    handler.end_topic(event)
+                    continue
+                stack.append(
+                    _open_topic(child, TopicEvent(next(ids), event, index), handler)
+                )
+        handler.end_sheet(index)
+    handler.end_document()
@@ -0,0 +1,2 @@
+def pkg_help():
+    print("Common modules shared by the examples and the rest api server.")
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import registry
+
+# 准入控制: 按客户端和按路由的令牌桶限流 (超限返回 429), 加全局并发上限.
+# 并发已满时请求排队, 排队超过 queue_timeout 或队列已满返回 503, 避免请求无限堆积,
+# 保证已接收请求的延迟有上限. 状态都在进程内, 多 worker 时每个 worker 各自限流.
+
+SHED_TOTAL = registry.counter(
+    "http_requests_shed_total",
+    "Requests rejected by admission control.",
+    ("reason",),
+)
+ADMISSION_QUEUE = registry.gauge(
+    "http_admission_queue_waiting", "Requests waiting for a concurrency slot."
+)
+ADMISSION_WAIT = registry.histogram(
+    "http_admission_wait_seconds", "Time admitted requests waited for a slot."
+)
+
+# (每秒速率, 桶容量)
+RateLimit = Tuple[float, float]
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Take one token, return 0 if taken, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Give back a token taken for a request that was rejected elsewhere."""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class RateLimiter:
+    """Token buckets by key, the least recently used keys are dropped past max_keys."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take()
+
+    def refund(self, key: str):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.refund()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware for rate limiting (429) and load shedding (503)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        client_limit: Optional[RateLimit] = (50, 100),
+        route_limits: Optional[Dict[str, RateLimit]] = None,
+        max_concurrency: int = 100,
+        max_queue: int = 200,
+        queue_timeout: float = 1.0,
+        retry_after: int = 1,
+        exempt_paths: Sequence[str] = ("/metrics", "/healthz"),
+        trust_forwarded: bool = False,
+    ):
+        self.app = app
+        self.client_limiter = RateLimiter(*client_limit) if client_limit else None
+        # route_limits 按路径前缀匹配, 最长前缀优先
+        self.route_limiters = {
+            prefix: RateLimiter(rate, burst)
+            for prefix, (rate, burst) in sorted(
+                (route_limits or {}).items(), key=lambda kv: -len(kv[0])
+            )
+        }
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = set(exempt_paths)
+        self.trust_forwarded = trust_forwarded
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self._check_rate(scope)
+        if wait is not None:
+            reason, seconds = wait
+            SHED_TOTAL.inc(reason)
+            await self._reject(send, 429, "too many requests", math.ceil(seconds))
+            return
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+
+        if semaphore.locked() and self._waiting >= self.max_queue:
+            SHED_TOTAL.inc("queue_full")
+            await self._reject(send, 503, "server is busy", self.retry_after)
+            return
+
+        start = time.perf_counter()
+        self._waiting += 1
+        ADMISSION_QUEUE.inc()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            SHED_TOTAL.inc("queue_timeout")
+            await self._reject(send, 503, "server is busy", self.retry_after)
+            return
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE.dec()
+
+        ADMISSION_WAIT.observe(time.perf_counter() - start)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            semaphore.release()
+
+    def _client_key(self, scope: Scope) -> str:
+        if self.trust_forwarded:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _check_rate(self, scope: Scope) -> Optional[Tuple[str, float]]:
+        """Return (reason, retry after seconds) if the request is over a rate limit."""
+        # 先检查客户端限流: 已超限的客户端被拒绝时不消耗路由的令牌, 不影响其他客户端
+        client_key = None
+        if self.client_limiter is not None:
+            client_key = self._client_key(scope)
+            wait = self.client_limiter.take(client_key)
+            if wait > 0:
+                return "client_rate", wait
+
+        path = scope["path"]
+        for prefix, limiter in self.route_limiters.items():
+            if path.startswith(prefix):
+                wait = limiter.take(prefix)
+                if wait > 0:
+                    # 被路由限流拒绝的请求退还客户端令牌
+                    if client_key is not None:
+                        self.client_limiter.refund(client_key)  # type: ignore
+                    return "route_rate", wait
+                break
+        return None
+
+    async def _reject(self, send: Send, status: int, message: str, retry_after: int):
+        body = json.dumps({"message": message}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(retry_after, 1)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,159 @@
+import zlib
+from typing import Optional, Sequence, Tuple
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 响应压缩: 按 Accept-Encoding 协商 br/gzip, 小于 minimum_size 的响应不压缩.
+# 流式响应逐块压缩并 flush, 客户端可以边收边解压.
+
+# 同等 q 值时按此顺序优先
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+
+def select_encoding(
+    accept_encoding: str, supported: Sequence[str] = SUPPORTED_ENCODINGS
+) -> Optional[str]:
+    """Pick the supported encoding with the highest q value, None if no match."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best: Optional[Tuple[float, str]] = None
+    for enc in supported:
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, enc)
+    return best[1] if best else None
+
+
+class _Compressor:
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: 输出 gzip 格式 (带 header 和 crc)
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies with brotli or gzip."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_types: Sequence[str] = ("text/event-stream", "image/", "video/"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_types = tuple(excluded_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                # 第一个 body 块: 决定是否压缩, 再发送 response start
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=list(start.get("headers", [])))
+                if not self._compressible(start["status"], headers) or (
+                    not more_body and len(body) < self.minimum_size
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("accept-encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # 压缩后字节不同, 强 ETag 改为弱 ETag
+                    headers["etag"] = "W/" + etag
+                if more_body:
+                    del headers["content-length"]
+                    body = compressor.compress(body, flush=True)
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["content-length"] = str(len(body))
+                start["headers"] = headers.raw
+                await send(start)
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": more_body}
+                )
+                return
+
+            assert compressor is not None
+            if more_body:
+                body = compressor.compress(body, flush=True)
+            else:
+                body = compressor.compress(body) + compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None:
+            # 响应没有 body 消息 (不符合 ASGI 规范), 原样发送 start
+            await send(start_message)
+
+    def _compressible(self, status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(self.excluded_types)
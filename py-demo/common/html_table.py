@@ -0,0 +1,390 @@
+import csv
+import dataclasses
+import importlib.util
+import json
+import re
+import warnings
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+# HTML 表格提取: 解析器后端只负责遍历 <table> 的行和单元格, 得到原始单元格 (文本, rowspan, colspan,
+# 是否为 th), 再由 build_table 按 rowspan/colspan 展开为每行列数相同的二维表.
+# - selectolax (lexbor) 和 lxml 是可选依赖 (uv sync --extra html), 比 bs4 + html.parser 快很多
+# - auto 按 selectolax, lxml, html.parser 的顺序选择已安装的后端
+# - html.parser 不按 HTML5 规则补全省略的结束标签 (如 <td>1<td>2, <th>A<th>B), 单元格会嵌套,
+#   这类表格的结果与 selectolax/lxml 不同; auto 回退到 html.parser 时发出警告
+# - 跨行/跨列的单元格在覆盖的每个位置重复其文本, 跨行不超出所在行组 (thead/tbody/tfoot) 的最后一行
+# - 与 HTML 表格模型相同, 第一个 <thead> 的行排在最前, 第一个 <tfoot> 的行排在最后 (不论其在文档中的位置)
+# - <thead> 中的行作为表头, 没有 <thead> 时表格开头只包含 th 的行作为表头, 多行表头按列合并
+# - bytes 先按与 bs4 相同的规则检测编码并解码, 再交给 lxml/selectolax
+# - 嵌套表格单独输出, 其文本同时包含在外层单元格的文本中
+
+BACKENDS = ("auto", "selectolax", "lxml", "html.parser")
+OUTPUT_FORMATS = ("markdown", "csv", "json")
+# 与浏览器相同的上限 (HTML 规范)
+MAX_COLSPAN = 1000
+MAX_ROWSPAN = 65534
+
+_SECTION_TAGS = ("thead", "tbody", "tfoot")
+_CELL_TAGS = ("td", "th")
+_SPAN_RE = re.compile(r"\s*(\d+)")
+_XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class RawCell:
+    text: str
+    rowspan: int = 1
+    colspan: int = 1
+    header: bool = False
+
+
+# 一行的原始单元格, 所在行组的编号, 以及行组的标签 (thead/tbody/tfoot, 直接位于 <table> 下时为空).
+# 每个 thead/tbody/tfoot 是一个行组, 直接位于 <table> 下的连续 tr 也是一个行组 (隐式 tbody)
+RawRow = Tuple[List[RawCell], int, str]
+
+
+@dataclasses.dataclass(slots=True)
+class Table:
+    id: str = ""
+    caption: str = ""
+    # 没有表头时为空
+    header: List[str] = dataclasses.field(default_factory=list)
+    rows: List[List[str]] = dataclasses.field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+def _text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _span(value: Optional[str], limit: int) -> int:
+    # 与浏览器相同, 取开头的数字 ("2px" 为 2), 无效值为 1; rowspan=0 表示跨到最后一行
+    m = _SPAN_RE.match(value) if value else None
+    return min(int(m.group(1)), limit) if m else 1
+
+
+def _take_spans(row: List[str], col: int, spans: Dict[int, List[Any]]) -> int:
+    # 填入上方单元格跨行占据的位置, 返回下一个空闲列
+    while col in spans:
+        span = spans[col]
+        row.append(span[1])
+        span[0] -= 1
+        if span[0] <= 0:
+            del spans[col]
+        col += 1
+    return col
+
+
+def _table_order(raw_rows: Iterator[RawRow]) -> List[Tuple[List[RawCell], int, bool]]:
+    # 返回 (单元格, 行组编号, 是否为表头行组): 第一个 thead 在前, 第一个 tfoot 在后,
+    # 其余行组 (包括之后的 thead/tfoot) 按文档顺序作为表体
+    head, body, foot = [], [], []
+    head_group = foot_group = None
+    for cells, group, section in raw_rows:
+        if section == "thead" and head_group in (None, group):
+            head_group = group
+            head.append((cells, group, True))
+        elif section == "tfoot" and foot_group in (None, group):
+            foot_group = group
+            foot.append((cells, group, False))
+        else:
+            body.append((cells, group, False))
+    return head + body + foot
+
+
+def build_table(raw_rows: Iterator[RawRow], id: str = "", caption: str = "") -> Table:
+    """Expand rowspan/colspan of raw rows into a rectangular table."""
+    grid: List[List[str]] = []
+    header_count = 0
+    # 列号 -> [剩余行数, 文本]
+    spans: Dict[int, List[Any]] = {}
+    current_group = None
+    rows = _table_order(raw_rows)
+    # 有 <thead> 时只用其中的行作为表头
+    has_head = bool(rows) and rows[0][2]
+    for cells, group, in_head in rows:
+        if group != current_group:
+            # 与 HTML 表格模型相同, 跨行在行组末尾截断
+            spans.clear()
+            current_group = group
+        if not cells and not spans:
+            continue
+        row: List[str] = []
+        col = 0
+        for cell in cells:
+            col = _take_spans(row, col, spans)
+            rowspan = cell.rowspan or MAX_ROWSPAN
+            for _ in range(max(cell.colspan, 1)):
+                row.append(cell.text)
+                if rowspan > 1:
+                    spans[col] = [rowspan - 1, cell.text]
+                col += 1
+        # 行尾之后仍被上方单元格占据的列, 中间的空位补空字符串
+        for c in sorted(spans):
+            if c >= col:
+                row.extend([""] * (c - col))
+                col = _take_spans(row, c, spans)
+        if header_count == len(grid) and (
+            in_head or (not has_head and cells and all(c.header for c in cells))
+        ):
+            header_count += 1
+        grid.append(row)
+
+    width = max((len(row) for row in grid), default=0)
+    for row in grid:
+        row.extend([""] * (width - len(row)))
+    header: List[str] = []
+    if header_count:
+        for values in zip(*grid[:header_count]):
+            # 多行表头按列合并, 跨列/跨行重复的文本只保留一次
+            parts = [v for i, v in enumerate(values) if v and v not in values[:i]]
+            header.append(" / ".join(parts))
+    return Table(id, caption, header, grid[header_count:])
+
+
+# bs4
+
+
+def _bs4_cells(tr) -> List[RawCell]:
+    return [
+        RawCell(
+            _text(td.get_text()),
+            _span(td.get("rowspan"), MAX_ROWSPAN),
+            _span(td.get("colspan"), MAX_COLSPAN),
+            td.name == "th",
+        )
+        for td in tr.find_all(_CELL_TAGS, recursive=False)
+    ]
+
+
+def _bs4_rows(table) -> Iterator[RawRow]:
+    group, bare = 0, False
+    for child in table.find_all(True, recursive=False):
+        if child.name == "tr":
+            if not bare:
+                group, bare = group + 1, True
+            yield _bs4_cells(child), group, ""
+        elif child.name in _SECTION_TAGS:
+            group += 1
+            bare = False
+            for tr in child.find_all("tr", recursive=False):
+                yield _bs4_cells(tr), group, child.name
+
+
+def table_from_bs4(table) -> Table:
+    """Table of a <table> element already parsed by BeautifulSoup."""
+    caption = table.find("caption", recursive=False)
+    return build_table(
+        _bs4_rows(table),
+        table.get("id") or "",
+        _text(caption.get_text()) if caption else "",
+    )
+
+
+def _iter_bs4(html: Union[str, bytes]) -> Iterator[Table]:
+    from bs4 import BeautifulSoup
+
+    # html.parser 遇到下一个 <td> 时不关闭上一个, 省略结束标签的单元格嵌套在前一个单元格中
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    for table in soup.find_all("table"):
+        yield table_from_bs4(table)
+
+
+# lxml
+
+
+def _lxml_cells(tr) -> List[RawCell]:
+    return [
+        RawCell(
+            _text(td.text_content()),
+            _span(td.get("rowspan"), MAX_ROWSPAN),
+            _span(td.get("colspan"), MAX_COLSPAN),
+            td.tag == "th",
+        )
+        for td in tr
+        if td.tag in _CELL_TAGS
+    ]
+
+
+def _lxml_rows(table) -> Iterator[RawRow]:
+    # 注释等节点的 tag 不是字符串, 与 _CELL_TAGS / _SECTION_TAGS 比较时自然被跳过
+    group, bare = 0, False
+    for child in table:
+        if child.tag == "tr":
+            if not bare:
+                group, bare = group + 1, True
+            yield _lxml_cells(child), group, ""
+        elif child.tag in _SECTION_TAGS:
+            group += 1
+            bare = False
+            for tr in child:
+                if tr.tag == "tr":
+                    yield _lxml_cells(tr), group, child.tag
+
+
+def _markup(html: Union[str, bytes]) -> str:
+    if isinstance(html, bytes):
+        from bs4.dammit import UnicodeDammit
+
+        # libxml2 对没有 <meta charset> 的 utf-8 页面按 latin-1 解码, lexbor 不识别
+        # <meta charset="gbk"> 等, 这里与 bs4 相同: 依次按 BOM, <meta charset>, utf-8,
+        # windows-1252 检测编码
+        html = UnicodeDammit(html, is_html=True).unicode_markup or ""
+    # lxml 不接受带编码声明的 str, 去掉开头的 <?xml ...?>
+    m = _XML_DECL_RE.match(html)
+    return html[m.end() :] if m else html
+
+
+def _iter_lxml(html: Union[str, bytes]) -> Iterator[Table]:
+    from lxml import html as lxml_html
+
+    html = _markup(html)
+    if not html.strip():
+        return
+    doc = lxml_html.document_fromstring(html)
+    for table in doc.iter("table"):
+        caption = next((c for c in table if c.tag == "caption"), None)
+        yield build_table(
+            _lxml_rows(table),
+            table.get("id") or "",
+            _text(caption.text_content()) if caption is not None else "",
+        )
+
+
+# selectolax
+
+
+def _lexbor_cells(tr) -> List[RawCell]:
+    cells = []
+    for td in tr.iter():
+        if td.tag in _CELL_TAGS:
+            attrs = td.attributes
+            cells.append(
+                RawCell(
+                    _text(td.text(deep=True)),
+                    _span(attrs.get("rowspan"), MAX_ROWSPAN),
+                    _span(attrs.get("colspan"), MAX_COLSPAN),
+                    td.tag == "th",
+                )
+            )
+    return cells
+
+
+def _lexbor_rows(table) -> Iterator[RawRow]:
+    # lexbor 按 HTML5 规则解析, 直接位于 <table> 下的 tr 会被放入 <tbody>
+    group, bare = 0, False
+    for child in table.iter():
+        if child.tag == "tr":
+            if not bare:
+                group, bare = group + 1, True
+            yield _lexbor_cells(child), group, ""
+        elif child.tag in _SECTION_TAGS:
+            group += 1
+            bare = False
+            for tr in child.iter():
+                if tr.tag == "tr":
+                    yield _lexbor_cells(tr), group, child.tag
+
+
+def _iter_selectolax(html: Union[str, bytes]) -> Iterator[Table]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(_markup(html))
+    for table in tree.css("table"):
+        caption = next((c for c in table.iter() if c.tag == "caption"), None)
+        yield build_table(
+            _lexbor_rows(table),
+            table.attributes.get("id") or "",
+            _text(caption.text(deep=True)) if caption is not None else "",
+        )
+
+
+_BACKEND_MODULES = {"selectolax": "selectolax", "lxml": "lxml", "html.parser": "bs4"}
+_ITERATORS = {
+    "selectolax": _iter_selectolax,
+    "lxml": _iter_lxml,
+    "html.parser": _iter_bs4,
+}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """Installed backend for name, auto picks the fastest one available."""
+    if name == "auto":
+        for backend, module in _BACKEND_MODULES.items():
+            if importlib.util.find_spec(module) is not None:
+                if backend == "html.parser":
+                    warnings.warn(
+                        "html extra is not installed, falling back to html.parser "
+                        "which does not close omitted </td>/</th>/</tr> tags, "
+                        "install it with: uv sync --extra html",
+                        stacklevel=3,
+                    )
+                return backend
+        raise ValueError("no html parser installed, install one with: uv sync")
+    if name not in _BACKEND_MODULES:
+        raise ValueError(f"unknown html backend: {name}, supported: {BACKENDS}")
+    if importlib.util.find_spec(_BACKEND_MODULES[name]) is None:
+        raise ValueError(
+            f"html backend {name} is not installed, install it with: "
+            f"uv sync --extra html"
+        )
+    return name
+
+
+def iter_tables(html: Union[str, bytes], backend: str = "auto") -> Iterator[Table]:
+    """Yield the tables of an html document in document order."""
+    return _ITERATORS[resolve_backend(backend)](html)
+
+
+def extract_tables(
+    html: Union[str, bytes], backend: str = "auto", table_id: Optional[str] = None
+) -> List[Table]:
+    """Tables of an html document, only the one with table_id if given."""
+    return [
+        t for t in iter_tables(html, backend) if table_id is None or t.id == table_id
+    ]
+
+
+# output
+
+
+def _md_cell(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("|", "\\|")
+
+
+def to_markdown(table: Table) -> str:
+    """Markdown table, the first row is used as the header when there is none."""
+    header, rows = table.header, table.rows
+    if not header:
+        if not rows:
+            return ""
+        header, rows = rows[0], rows[1:]
+    lines = [
+        f"| {' | '.join(_md_cell(c) for c in header)} |",
+        f"| {' | '.join('-' * max(3, len(c)) for c in header)} |",
+    ]
+    for row in rows:
+        lines.append(f"| {' | '.join(_md_cell(c) for c in row)} |")
+    return "\n".join(lines)
+
+
+def write_tables(tables: Sequence[Table], out: TextIO, fmt: str = "markdown"):
+    """Write tables as markdown or csv (separated by a blank line) or a json list."""
+    if fmt == "json":
+        json.dump([t.to_dict() for t in tables], out, ensure_ascii=False, indent=2)
+        out.write("\n")
+        return
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {fmt}, supported: {OUTPUT_FORMATS}")
+    for i, table in enumerate(tables):
+        if i:
+            out.write("\n")
+        if fmt == "markdown":
+            out.write(to_markdown(table) + "\n")
+        else:
+            writer = csv.writer(out)
+            if table.header:
+                writer.writerow(table.header)
+            writer.writerows(table.rows)
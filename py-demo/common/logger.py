@@ -0,0 +1,58 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[QueueListener] = None
+# 启动 listener 的进程: 线程不会被 fork 继承, 子进程需要重新启动自己的 listener
+_listener_pid = 0
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(_FORMAT))
+    return handler
+
+
+def setup_stream_logging(level: int = logging.INFO):
+    """Write the records of the root logger to stderr directly, e.g. in a prefork master."""
+    root = logging.getLogger()
+    root.handlers = [_stream_handler()]
+    root.setLevel(level)
+
+
+def setup_queue_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Route the root logger through a QueueHandler, a background thread writes the
+    records to stderr, so logging on the request path never blocks on I/O.
+
+    Call it in the process that serves requests, after fork.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, _stream_handler(), respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_queue_logging)
+    return _listener
+
+
+def stop_queue_logging():
+    """Flush the queued records and stop the listener thread of this process."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener = None
+        # 之后的日志直接写 stderr, 不再进入无人处理的队列
+        logging.getLogger().handlers = [_stream_handler()]
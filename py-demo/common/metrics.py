@@ -0,0 +1,295 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# 请求指标: 按路由的延迟直方图 (p50/p95/p99), 进行中请求数, 状态码计数, 每个请求的 DB 耗时,
+# 以 prometheus 文本格式在 /metrics 暴露
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for values, value in sorted(self._values.items()):
+            labels = _labels(self.label_names, values)
+            lines.append(f"{self.name}{labels} {_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram, quantiles are estimated by interpolating in buckets."""
+
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 每组 label: [各桶计数 (最后一个为 +Inf)], sum, count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+                self._series[label_values] = series
+            counts, totals = series
+            counts[idx] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def quantile(self, q: float, *label_values: str) -> Optional[float]:
+        series = self._series.get(label_values)
+        if series is None or series[1][1] == 0:
+            return None
+        counts, totals = series
+        rank = q * totals[1]
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    # 落在 +Inf 桶, 返回最大的有限桶边界
+                    return self.buckets[-1]
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        quantile_lines = [
+            f"# HELP {self.name}_quantile Estimated p50/p95/p99 of {self.name}.",
+            f"# TYPE {self.name}_quantile gauge",
+        ]
+        for values, (counts, totals) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                labels = _labels(self.label_names, values, le=str(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_value(totals[0])}")
+            lines.append(f"{self.name}_count{labels} {int(totals[1])}")
+            for q in self.quantiles:
+                labels = _labels(self.label_names, values, quantile=str(q))
+                quantile_lines.append(
+                    f"{self.name}_quantile{labels} {self.quantile(q, *values)}"
+                )
+        return lines + quantile_lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, doc: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, doc, label_names))
+
+    def gauge(self, name: str, doc: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, doc, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        doc: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, doc, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "Total HTTP requests.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being processed."
+)
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+REQUEST_DB_DURATION = registry.histogram(
+    "http_request_db_seconds", "Database time per HTTP request.", ("method", "route")
+)
+
+# 当前请求累计的 DB 耗时, 由 middleware 设置, sqlalchemy 事件累加
+_db_time: ContextVar[Optional[List[float]]] = ContextVar("db_time", default=None)
+
+
+def instrument_engine(engine: Engine):
+    """Add cursor execute hooks to a (sync) engine to account DB time per request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        holder = _db_time.get()
+        if holder is not None:
+            holder[0] += elapsed
+
+
+def route_label(scope: Scope) -> str:
+    # 使用路由模板 (如 /users/{user_id}) 而不是原始路径, 避免 label 数量无限增长
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics and serving them at metrics_path."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics_path: str = "/metrics",
+        access_log: bool = False,
+    ):
+        self.app = app
+        self.metrics_path = metrics_path
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] == self.metrics_path:
+            await self._send_metrics(send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+        db_time = [0.0]
+        token = _db_time.set(db_time)
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                headers = list(message.get("headers", []))
+                process_time = f"{(time.perf_counter() - start):.4f}"
+                headers.append((b"x-process-time", process_time.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _db_time.reset(token)
+
+            method, route = scope["method"], route_label(scope)
+            REQUESTS_TOTAL.inc(method, route, status)
+            REQUEST_DURATION.observe(elapsed, method, route)
+            REQUEST_DB_DURATION.observe(db_time[0], method, route)
+            if self.access_log:
+                logger.info(
+                    "%s %s %s processed in %.4f seconds (db %.4f)",
+                    method,
+                    scope["path"],
+                    status,
+                    elapsed,
+                    db_time[0],
+                )
+
+    async def _send_metrics(self, send: Send):
+        body = registry.render().encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
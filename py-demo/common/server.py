@@ -0,0 +1,238 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .logger import setup_queue_logging, stop_queue_logging
+
+logger = logging.getLogger(__name__)
+
+# prefork 启动器: 主进程先执行 preload (如建表) 并绑定端口, 再 fork 出 N 个 uvicorn worker.
+# 收到 SIGTERM 时转发给 worker, worker 停止接收新连接并处理完进行中的请求后退出.
+# worker 退出后按 worker 序号指数退避重启; 连续多次启动后很快退出 (如 DB 不可用, 导入错误) 时
+# 主进程停止所有 worker 并退出, 不反复 fork.
+# 日志: QueueListener 线程不会被 fork 继承, 每个 worker 在 fork 之后启动自己的 queue logging,
+# 主进程使用普通的 stream handler (见 common/logger.py).
+# 依赖 os.fork, 仅支持 linux/macos.
+
+# worker 运行不足该秒数就退出时算一次启动失败
+MIN_UPTIME = 10.0
+# 连续启动失败的次数上限, 超过后主进程退出
+MAX_START_FAILURES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+STARTUP_FAILURE = 3
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # 每个 worker 绑定自己的 socket, 由内核在 worker 之间分配新连接
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 8081,
+        workers: int = 1,
+        graceful_timeout: int = 30,
+        reuse_port: bool = False,
+        preload: Optional[Callable[[], None]] = None,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.reuse_port = reuse_port
+        self.preload = preload
+        self._sock: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}  # pid -> worker index
+        self._spawned_at: Dict[int, float] = {}  # worker index -> 启动时间
+        self._failures: Dict[int, int] = {}  # worker index -> 连续启动失败次数
+        self._restarts: Dict[int, float] = {}  # worker index -> 计划重启的时间
+        self._stopping = False
+        self.failed = False
+
+    def _serve(self, sock: socket.socket):
+        import uvicorn
+
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        server = uvicorn.Server(config)
+        try:
+            server.run(sockets=[sock])
+        except KeyboardInterrupt:
+            # 与 uvicorn.run 相同: ctrl+c 时 uvicorn 完成关闭流程后重新抛出 KeyboardInterrupt
+            return
+        if not server.started:
+            # lifespan 启动失败时 uvicorn 正常返回, 与 uvicorn 命令行相同以退出码 3 退出
+            raise SystemExit(STARTUP_FAILURE)
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid > 0:
+            self._children[pid] = index
+            self._spawned_at[index] = time.monotonic()
+            return
+
+        # worker 进程: 恢复默认信号处理, 由 uvicorn 接管 SIGINT/SIGTERM
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        setup_queue_logging(logging.getLogger().level)
+        code = 0
+        try:
+            sock = self._sock or bind_socket(self.host, self.port, reuse_port=True)
+            self._serve(sock)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:  # pylint: disable=broad-exception-caught
+            logger.exception("worker %d crashed", index)
+            code = 1
+        finally:
+            # os._exit 不执行 atexit, 先写出队列中的日志
+            stop_queue_logging()
+            os._exit(code)
+
+    def _on_worker_exit(self, index: int, pid: int, status: int):
+        code = os.waitstatus_to_exitcode(status)
+        uptime = time.monotonic() - self._spawned_at.get(index, 0.0)
+        if uptime >= MIN_UPTIME:
+            self._failures[index] = 0
+        else:
+            self._failures[index] = self._failures.get(index, 0) + 1
+        failures = self._failures[index]
+
+        if failures >= MAX_START_FAILURES:
+            logger.error(
+                "worker %d (pid %d) exited with status %d within %.0fs of start "
+                "%d times in a row, stopping the server",
+                index,
+                pid,
+                code,
+                MIN_UPTIME,
+                failures,
+            )
+            self.failed = True
+            self._on_sigterm(signal.SIGTERM, None)
+            return
+
+        delay = min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX) if failures else 0
+        logger.warning(
+            "worker %d (pid %d) exited with status %d, restarting in %.1fs",
+            index,
+            pid,
+            code,
+            delay,
+        )
+        self._restarts[index] = time.monotonic() + delay
+
+    def _on_sigterm(self, signum, frame):
+        _ = frame
+        self._stopping = True
+        for pid in self._children:
+            os.kill(pid, signum)
+
+    def _on_sigint(self, signum, frame):
+        _ = signum, frame
+        # ctrl+c 会发给整个进程组, worker 已收到 SIGINT, 这里不再转发
+        self._stopping = True
+
+    def run(self):
+        if self.preload is not None:
+            self.preload()
+
+        if self.workers <= 1:
+            setup_queue_logging(logging.getLogger().level)
+            self._serve(bind_socket(self.host, self.port))
+            return
+
+        if not self.reuse_port:
+            self._sock = bind_socket(self.host, self.port)
+        signal.signal(signal.SIGTERM, self._on_sigterm)
+        signal.signal(signal.SIGINT, self._on_sigint)
+        for i in range(self.workers):
+            self._spawn(i)
+        logger.info(
+            "started %d workers on %s:%d, pids: %s",
+            self.workers,
+            self.host,
+            self.port,
+            list(self._children),
+        )
+
+        stop_deadline: Optional[float] = None
+        while self._children or (self._restarts and not self._stopping):
+            for index, at in list(self._restarts.items()):
+                if self._stopping:
+                    self._restarts.clear()
+                elif at <= time.monotonic():
+                    del self._restarts[index]
+                    self._spawn(index)
+
+            pid, status = os.waitpid(-1, os.WNOHANG) if self._children else (0, 0)
+            if pid == 0:
+                if self._stopping and stop_deadline is None:
+                    stop_deadline = time.monotonic() + self.graceful_timeout + 5
+                if stop_deadline is not None and time.monotonic() > stop_deadline:
+                    # 超过优雅退出时间仍未退出的 worker 强制结束
+                    for child in self._children:
+                        os.kill(child, signal.SIGKILL)
+                time.sleep(0.1)
+                continue
+
+            index = self._children.pop(pid)
+            if not self._stopping:
+                self._on_worker_exit(index, pid, status)
+
+        if self._sock is not None:
+            self._sock.close()
+        logger.info("all workers stopped")
+        if self.failed:
+            raise SystemExit(1)
+
+
+def run_server(
+    app: Any,
+    host: str = "0.0.0.0",
+    port: int = 8081,
+    workers: int = 1,
+    graceful_timeout: int = 30,
+    reuse_port: bool = False,
+    preload: Optional[Callable[[], None]] = None,
+):
+    PreforkServer(app, host, port, workers, graceful_timeout, reuse_port, preload).run()
+
+
+def add_server_args(parser):
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="seconds to drain in-flight requests on shutdown",
+    )
+    parser.add_argument(
+        "--reuse-port",
+        action="store_true",
+        help="one SO_REUSEPORT socket per worker instead of a shared socket",
+    )
@@ -0,0 +1,148 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# 启动耗时分析: 在新的解释器进程中用 -X importtime 导入入口模块 (并构建 app),
+# 汇总为按累计耗时排序的导入树, 同时统计冷启动的总耗时 (包含解释器启动).
+
+_CHILD_CODE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {cwd!r})
+module = importlib.import_module({module!r})
+for attr in {attrs!r}:
+    getattr(module, attr)
+print(json.dumps({{"load_seconds": time.perf_counter() - start}}))
+"""
+
+
+class ImportNode:
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children: List["ImportNode"] = []
+
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """Build the import tree from -X importtime output, return the top-level nodes."""
+    # 输出是后序的: 子模块先于父模块打印, 缩进 (每层 2 个空格) 表示嵌套层级
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|", 2)
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name_part = parts[2][1:]
+        name = name_part.lstrip()
+        depth = (len(name_part) - len(name)) // 2
+        node = ImportNode(name, int(parts[0]), int(parts[1]))
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def aggregate_by_package(roots: List[ImportNode]) -> List[Tuple[str, int, int]]:
+    """Sum self time by top-level package: [(package, self_us, modules)]."""
+    totals: Dict[str, List[int]] = {}
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        stack.extend(node.children)
+        item = totals.setdefault(node.name.split(".")[0], [0, 0])
+        item[0] += node.self_us
+        item[1] += 1
+    return sorted(((pkg, v[0], v[1]) for pkg, v in totals.items()), key=lambda x: -x[1])
+
+
+def format_tree(
+    roots: List[ImportNode], min_ms: float = 1.0, max_depth: int = 4
+) -> List[str]:
+    lines = []
+
+    def _walk(nodes: List[ImportNode], depth: int):
+        for node in sorted(nodes, key=lambda n: -n.cumulative_us):
+            if node.cumulative_us / 1000 < min_ms:
+                continue
+            lines.append(
+                f"{node.cumulative_us / 1000:9.1f} {node.self_us / 1000:8.1f}  "
+                f"{'  ' * depth}{node.name}"
+            )
+            if depth + 1 < max_depth:
+                _walk(node.children, depth + 1)
+
+    _walk(roots, 0)
+    return lines
+
+
+def run_cold_start(
+    module: str, cwd: str, attrs: Tuple[str, ...] = ()
+) -> Tuple[float, float, str]:
+    """Import module in a new interpreter, return (wall seconds, load seconds, importtime output)."""
+    code = _CHILD_CODE.format(cwd=cwd, module=module, attrs=tuple(attrs))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        # importtime 输出中混有 traceback, 只取非 importtime 行
+        errors = [
+            l for l in proc.stderr.splitlines() if not l.startswith("import time:")
+        ]
+        raise RuntimeError(f"import {module} failed:\n" + "\n".join(errors))
+    load = json.loads(proc.stdout.strip().splitlines()[-1])["load_seconds"]
+    return wall, load, proc.stderr
+
+
+def profile_startup(
+    module: str,
+    cwd: str,
+    attrs: Tuple[str, ...] = (),
+    repeat: int = 3,
+    top: int = 15,
+    min_ms: float = 1.0,
+):
+    """Print cold start time and the aggregated import tree of an entry module."""
+    runs = [run_cold_start(module, cwd, attrs) for _ in range(max(repeat, 1))]
+    walls = [r[0] for r in runs]
+    # 取最快的一次输出导入树, 受磁盘缓存等干扰最小
+    wall, load, output = min(runs, key=lambda r: r[0])
+    roots = parse_importtime(output)
+    target = f"{module}.{'.'.join(attrs)}" if attrs else module
+
+    print(f"cold start of {target} ({len(runs)} runs, in {cwd}):")
+    print(
+        f"  wall time: min {wall * 1000:.1f} ms, median {statistics.median(walls) * 1000:.1f} ms, "
+        f"max {max(walls) * 1000:.1f} ms (interpreter startup included)"
+    )
+    print(f"  import and init: {load * 1000:.1f} ms")
+    print()
+    print(f"import tree (modules >= {min_ms} ms, sorted by cumulative time):")
+    print(f"{'cum ms':>9} {'self ms':>8}  module")
+    for line in format_tree(roots, min_ms=min_ms):
+        print(line)
+    print()
+    print(f"top {top} packages by self time:")
+    for pkg, self_us, count in aggregate_by_package(roots)[:top]:
+        print(f"  {self_us / 1000:9.1f} ms  {pkg} ({count} modules)")
+
+
+def add_profile_args(parser):
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the import time tree and cold start time, then exit",
+    )
+    parser.add_argument(
+        "--profile-repeat", type=int, default=3, help="cold start runs to profile"
+    )
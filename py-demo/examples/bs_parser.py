@@ -1,7 +1,14 @@
-from typing import List
+import os
+import sys
+import time
 
 from bs4 import BeautifulSoup, Tag
 
+# py-demo 根目录加入 sys.path, 以导入公共模块 common/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.html_table import extract_tables, table_from_bs4, to_markdown
+
 
 def test_parse_html_01():
     html_doc = """<html>
@@ -103,25 +110,8 @@ def test_parse_html_02():
 
 
 def print_html_table_as_markdown(tab_element: Tag):
-    # parse table headers
-    headers: List[str] = []
-    splits: List[str] = []
-    ths = tab_element.find_all("th")
-    for th in ths:
-        column = th.get_text()
-        headers.append(column)
-        splits.append("-" * len(column))
-
-    # parse table rows
-    rows: List[List[str]] = []
-    tds = tab_element.find_all("td")
-    for i in range(0, len(tds), len(ths)):
-        rows.append([tds[i].get_text(), tds[i + 1].get_text()])
-
-    print(f"| {' | '.join(headers)} |")
-    print(f"| {' | '.join(splits)} |")
-    for row in rows:
-        print(f"| {' | '.join(row)} |")
+    # 任意列数, rowspan/colspan 展开后输出, 见 common/html_table.py
+    print(to_markdown(table_from_bs4(tab_element)))
 
 
 def test_parse_html_03():
@@ -174,7 +164,39 @@ def test_parse_html_03():
                 print_html_table_as_markdown(element)
 
 
+def test_parse_html_04():
+    """extract tables with rowspan/colspan, and compare the parser backends."""
+    html_doc = """<table id="sales">
+  <thead>
+    <tr><th rowspan="2">Region</th><th colspan="2">Sales</th></tr>
+    <tr><th>Q1</th><th>Q2</th></tr>
+  </thead>
+  <tbody>
+    <tr><td rowspan="2">North</td><td>10</td><td>12</td></tr>
+    <tr><td>11</td><td>13</td></tr>
+    <tr><td>South</td><td colspan="2">n/a</td></tr>
+  </tbody>
+</table>"""
+
+    for table in extract_tables(html_doc):
+        print(f"table {table.id}: header={table.header}")
+        print(to_markdown(table))
+
+    # 大页面上各后端的耗时, 未安装的后端 (uv sync --extra html) 跳过
+    page = "<html><body>" + html_doc * 2000 + "</body></html>"
+    for backend in ("html.parser", "lxml", "selectolax"):
+        try:
+            start = time.perf_counter()
+            tables = extract_tables(page, backend)
+            elapsed = time.perf_counter() - start
+        except ValueError as e:
+            print(f"{backend}: {e}")
+            continue
+        print(f"{backend}: {len(tables)} tables in {elapsed:.3f}s")
+
+
 if __name__ == "__main__":
     # test_parse_html_01()
     # test_parse_html_02()
-    test_parse_html_03()
+    # test_parse_html_03()
+    test_parse_html_04()
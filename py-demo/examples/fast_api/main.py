@@ -1,11 +1,24 @@
-import time
-from typing import Awaitable, Callable
+import argparse
+import os
+import sys
 
-from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi import APIRouter, FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
+from pydantic_settings import BaseSettings
 from router import test_router
 from starlette.status import HTTP_404_NOT_FOUND
 
+# py-demo 根目录加入 sys.path, 以导入公共模块 common/
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+from common.admission import AdmissionMiddleware
+from common.logger import setup_stream_logging
+from common.metrics import MetricsMiddleware
+from common.server import add_server_args, run_server
+from common.startup import add_profile_args, profile_startup
+
 router = APIRouter(tags=["fast api demo"])
 
 
@@ -20,17 +33,39 @@ app.include_router(router)
 app.include_router(test_router)
 
 
-@app.middleware("http")
-async def add_process_time_header(
-    request: Request, call_next: Callable[[Request], Awaitable[Response]]
-):
-    start = time.perf_counter()
-    response = await call_next(request)
+class AdmissionSettings(BaseSettings):
+    # 与 rest_api/settings.py 相同的 ADMISSION_ 环境变量, 压测时可用 ADMISSION_ENABLED=false 关闭
+    enabled: bool = True
+    client_rate: float = 200.0
+    client_burst: float = 400.0
+    # /test/sleep 路由的令牌桶
+    route_rate: float = 500.0
+    route_burst: float = 1000.0
+    max_concurrency: int = 200
+    max_queue: int = 400
+    queue_timeout: float = 1.0
+
+    class Config:
+        env_prefix = "ADMISSION_"
+
+
+# 准入控制: 按客户端/路由限流返回 429, 并发超过 200 时排队, 排队超过 1s 返回 503
+admission_config = AdmissionSettings()
+if admission_config.enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        client_limit=(admission_config.client_rate, admission_config.client_burst),
+        route_limits={
+            "/test/sleep": (admission_config.route_rate, admission_config.route_burst)
+        },
+        max_concurrency=admission_config.max_concurrency,
+        max_queue=admission_config.max_queue,
+        queue_timeout=admission_config.queue_timeout,
+    )
 
-    process_time = f"{(time.perf_counter() - start):.4f}"
-    response.headers["X-Process-Time"] = process_time
-    print(f"request to {request.url.path} processed in {process_time} seconds")
-    return response
+# 请求指标: 记录延迟直方图等, 设置 X-Process-Time 响应头, 在 /metrics 暴露
+# curl "http://localhost:8081/metrics"
+app.add_middleware(MetricsMiddleware, access_log=True)
 
 
 # curl "http://localhost:8081/"
@@ -53,11 +88,31 @@ async def not_found_hanlder(request: Request, err: HTTPException):
 
 
 def main():
-    import uvicorn
-
-    port = 8081
-    print(f"start fast api server at: {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    parser = argparse.ArgumentParser(description="fast api demo server")
+    add_server_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup(
+            "main",
+            os.path.dirname(os.path.abspath(__file__)),
+            attrs=("app",),
+            repeat=args.profile_repeat,
+        )
+        return
+
+    # worker 在 fork 之后各自启动 queue logging, 见 common/server.py
+    setup_stream_logging()
+    print(f"start fast api server at: {args.port}, workers: {args.workers}")
+    run_server(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        graceful_timeout=args.graceful_timeout,
+        reuse_port=args.reuse_port,
+    )
 
 
 if __name__ == "__main__":
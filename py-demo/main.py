@@ -4,10 +4,6 @@ import os
 import signal
 import sys
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 
 def init_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="py base demo.")
@@ -16,6 +12,11 @@ def init_args() -> argparse.Namespace:
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="enable verbose output"
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the import time tree and cold start time, then exit",
+    )
     return parser.parse_args()
 
 
@@ -46,6 +47,10 @@ def chat():
 
 
 def main():
+    # 只有 main 模式需要 .env 中的变量, 按需导入 dotenv, 其他模式启动更快
+    from dotenv import load_dotenv
+
+    load_dotenv()
     print("python root:", os.getenv("PYROOT", "unknown"))
     print("python project home:", os.getenv("PYHOME", "unknown"))
     print(f"run env: {os.getenv("ENV", "unknown")}")
@@ -54,9 +59,16 @@ def main():
 # run cli:
 # uv run main.py -v
 # uv run main.py -m chat
+# uv run main.py --profile-startup
 
 if __name__ == "__main__":
     args = init_args()
+    if args.profile_startup:
+        from common.startup import profile_startup
+
+        profile_startup("main", os.path.dirname(os.path.abspath(__file__)))
+        sys.exit(0)
+
     if args.verbose:
         print("verbose mode enabled")
         print(f"run mode: {args.mode}")
@@ -0,0 +1,126 @@
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Dict, List, Type
+
+import base_dao
+import settings
+from db import dispose_async_engines, dispose_engines, get_async_engine, get_engine
+from fastapi import FastAPI
+from sqlalchemy import Engine, inspect, text
+from sqlmodel import SQLModel
+from user_api import router as user_router
+from user_model import User
+
+# py-demo 根目录加入 sys.path, 以导入公共模块 common/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.admission import AdmissionMiddleware
+from common.compression import CompressionMiddleware
+from common.metrics import MetricsMiddleware, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# 由启动器在 fork worker 之前设置, worker 的 lifespan 据此跳过建表
+SCHEMA_READY_ENV = "REST_API_SCHEMA_READY"
+
+
+def create_db_and_tables():
+    SQLModel.metadata.create_all(
+        get_engine(),
+    )
+
+
+def add_missing_columns(
+    engine: Engine, model: Type[SQLModel], backfill: Dict[str, str]
+) -> List[str]:
+    """
+    Migration step run at startup: create_all does not alter existing tables, add the
+    model columns missing from the table. backfill maps a new column to the column
+    its existing rows are copied from. Returns the added column names.
+    """
+    table = model.__table__  # type: ignore
+    added = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        if not inspector.has_table(table.name):
+            return []
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        quote = conn.dialect.identifier_preparer.quote
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # 已有的行没有值, 新列先按可空添加, 再用 backfill 指定的列填充
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(
+                text(
+                    f"ALTER TABLE {quote(table.name)} "
+                    f"ADD COLUMN {quote(column.name)} {col_type}"
+                )
+            )
+            source = backfill.get(column.name)
+            if source:
+                conn.execute(
+                    text(
+                        f"UPDATE {quote(table.name)} "
+                        f"SET {quote(column.name)} = {quote(source)}"
+                    )
+                )
+            logger.info("added column %s.%s", table.name, column.name)
+            added.append(column.name)
+    return added
+
+
+def setup_schema():
+    create_db_and_tables()
+    # 旧版本创建的 users 表没有 updated_at 列 (ETag 的行版本), 用 created_at 填充
+    add_missing_columns(get_engine(), User, {"updated_at": "created_at"})
+    # 为 DAO 声明的查询字段补建缺失的索引
+    base_dao.user_dao.ensure_indexes()
+
+
+def preload_schema():
+    """Runs once in the launcher process, before the workers are forked."""
+    setup_schema()
+    # 关闭父进程中的连接, 避免 fork 后多个 worker 共用同一个 DB 连接
+    get_engine().dispose()
+    os.environ[SCHEMA_READY_ENV] = "1"
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if os.getenv(SCHEMA_READY_ENV) != "1":
+        setup_schema()
+    # 启动时建立一个连接, DB 不可用时 worker 直接启动失败
+    async with get_async_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    yield
+    dispose_engines()
+    await dispose_async_engines()
+
+
+app = FastAPI(title="users managerment demo", lifespan=lifespan)
+app.include_router(user_router)
+
+# 响应压缩 (br/gzip), 超过 1KB 的响应才压缩
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+# 准入控制: 限流 429, 并发超过 DB 连接池容量时排队, 排队超时 503
+admission_config = settings.admission_config
+db_config = settings.db_config
+if admission_config.enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        client_limit=(admission_config.client_rate, admission_config.client_burst),
+        route_limits={
+            "/users": (admission_config.route_rate, admission_config.route_burst)
+        },
+        max_concurrency=admission_config.max_concurrency
+        or db_config.pool_size + db_config.max_overflow,
+        max_queue=admission_config.max_queue,
+        queue_timeout=admission_config.queue_timeout,
+    )
+# 请求指标和每个请求的 DB 耗时, 在 /metrics 暴露. 最后添加, 位于最外层
+app.add_middleware(MetricsMiddleware)
+instrument_engine(get_engine())
+instrument_engine(get_async_engine().sync_engine)
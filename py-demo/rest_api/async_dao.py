@@ -0,0 +1,309 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from base_dao import USER_LOOKUP_FIELDS, ModelType, get_user_cache
+from bulk import insert_statement, to_rows, upsert_statement
+from cache import DaoCache
+from db import get_async_engine
+from lookup import (
+    check_lookup,
+    conditions_statement,
+    declared_indexed_fields,
+    ensure_indexes,
+    explain_sql,
+)
+from pagination import DEFAULT_PAGE_SIZE, clamp_page_size, keyset_statement, split_page
+from projection import projection_fields, rows_to_items
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from user_model import User
+
+
+class AsyncBaseDao(Generic[ModelType]):
+    """Async counterpart of BaseDao, runs queries on the shared async engine."""
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        engine: Optional[AsyncEngine] = None,
+        cursor_fields: Sequence[str] = ("created_at", "id"),
+        cache: Optional[DaoCache[ModelType]] = None,
+        lookup_fields: Optional[Sequence[str]] = None,
+        strict_lookup: bool = True,
+    ):
+        self.model = model
+        self.engine = engine or get_async_engine()
+        self.cursor_fields = tuple(cursor_fields)
+        self.cache = cache
+        self.lookup_fields = tuple(
+            lookup_fields or sorted(declared_indexed_fields(model))
+        )
+        self.strict_lookup = strict_lookup
+
+    def _cache_load(self, field: str, value: Any) -> Optional[ModelType]:
+        if self.cache is None or not self.cache.is_key_field(field):
+            return None
+        return self.cache.load(field, value)
+
+    def _cache_store(self, obj: Optional[ModelType]):
+        if self.cache is not None and obj is not None:
+            self.cache.store(obj)
+
+    def _cache_keys(self, obj: ModelType) -> Optional[Dict[str, Any]]:
+        return self.cache.key_values(obj) if self.cache is not None else None
+
+    def _cache_evict(self, keys: Optional[Dict[str, Any]]):
+        if self.cache is not None and keys is not None:
+            self.cache.evict(keys)
+
+    def _cache_clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    @asynccontextmanager
+    async def _session_scope(
+        self, session: Optional[AsyncSession]
+    ) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+            return
+        async with AsyncSession(self.engine, expire_on_commit=False) as new_session:
+            yield new_session
+
+    async def create(
+        self, obj_in: ModelType, session: Optional[AsyncSession] = None
+    ) -> ModelType:
+        async with self._session_scope(session) as session:
+            db_obj = self.model.model_validate(obj_in)
+            session.add(db_obj)
+            await session.commit()
+            await session.refresh(db_obj)
+            return db_obj
+
+    async def get_by_id(
+        self, user_id: int, session: Optional[AsyncSession] = None
+    ) -> Optional[ModelType]:
+        cached = self._cache_load("id", user_id)
+        if cached is not None:
+            return cached
+        async with self._session_scope(session) as session:
+            statement = select(self.model).where(self.model.id == user_id)  # type: ignore
+            result = (await session.exec(statement)).first()
+            self._cache_store(result)
+            return result
+
+    async def get_all(self, session: Optional[AsyncSession] = None) -> List[ModelType]:
+        async with self._session_scope(session) as session:
+            statement = select(self.model)
+            result = await session.exec(statement)
+            return list(result.all())
+
+    async def update(
+        self,
+        user_id: int,
+        obj_in: Dict[str, Any],
+        session: Optional[AsyncSession] = None,
+    ) -> Optional[ModelType]:
+        async with self._session_scope(session) as session:
+            statement = select(self.model).where(self.model.id == user_id)  # type: ignore
+            db_obj = (await session.exec(statement)).first()
+
+            if db_obj:
+                # 提交成功后按旧的键值失效: 提交前失效时, 并发的读取会把旧行重新写入缓存
+                old_keys = self._cache_keys(db_obj)
+                for key, value in obj_in.items():
+                    if hasattr(db_obj, key):
+                        setattr(db_obj, key, value)
+                session.add(db_obj)
+                await session.commit()
+                self._cache_evict(old_keys)
+                await session.refresh(db_obj)
+            return db_obj
+
+    async def delete(
+        self, user_id: int, session: Optional[AsyncSession] = None
+    ) -> bool:
+        async with self._session_scope(session) as session:
+            statement = select(self.model).where(self.model.id == user_id)  # type: ignore
+            db_obj = (await session.exec(statement)).first()
+            if not db_obj:
+                return False
+
+            old_keys = self._cache_keys(db_obj)
+            await session.delete(db_obj)
+            await session.commit()
+            self._cache_evict(old_keys)
+            return True
+
+    async def get_by_field(
+        self, field_name: str, value: Any, session: Optional[AsyncSession] = None
+    ) -> Optional[ModelType]:
+        check_lookup(self.model, [field_name], self.lookup_fields, self.strict_lookup)
+        cached = self._cache_load(field_name, value)
+        if cached is not None:
+            return cached
+        async with self._session_scope(session) as session:
+            statement = select(self.model).where(
+                getattr(self.model, field_name) == value
+            )
+            result = (await session.exec(statement)).first()
+            if self.cache is not None and self.cache.is_key_field(field_name):
+                self._cache_store(result)
+            return result
+
+    async def get_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        session: Optional[AsyncSession] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        limit = clamp_page_size(limit)
+        statement = keyset_statement(self.model, self.cursor_fields, cursor, limit)
+        async with self._session_scope(session) as session:
+            rows = (await session.exec(statement)).all()
+            return split_page(rows, self.cursor_fields, limit)
+
+    async def get_page_fields(
+        self,
+        fields: Sequence[str],
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        as_dict: bool = True,
+        session: Optional[AsyncSession] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        # 排序字段需要查出来用于生成游标, 但不返回给调用方
+        select_fields = projection_fields(self.model, fields, self.cursor_fields)
+        limit = clamp_page_size(limit)
+        statement = keyset_statement(
+            self.model, self.cursor_fields, cursor, limit, select_fields
+        )
+        async with self._session_scope(session) as session:
+            rows = (await session.exec(statement)).all()
+        items, next_cursor = split_page(rows, self.cursor_fields, limit)
+        return rows_to_items(items, fields, as_dict), next_cursor
+
+    async def stream_fields(
+        self,
+        fields: Sequence[str],
+        conditions: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        session: Optional[AsyncSession] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        if conditions:
+            check_lookup(self.model, conditions, self.lookup_fields, self.strict_lookup)
+        select_fields = projection_fields(self.model, fields)
+        statement = conditions_statement(
+            self.model, conditions or {}, select_fields
+        ).execution_options(yield_per=batch_size)
+        async with self._session_scope(session) as session:
+            result = await session.stream(statement)
+            async for rows in result.mappings().partitions():
+                yield [dict(row) for row in rows]
+
+    async def get_by_conditions(
+        self, conditions: Dict[str, Any], session: Optional[AsyncSession] = None
+    ) -> List[ModelType]:
+        check_lookup(self.model, conditions, self.lookup_fields, self.strict_lookup)
+        statement = conditions_statement(self.model, conditions)
+        async with self._session_scope(session) as session:
+            result = await session.exec(statement)  # type: ignore
+            return list(result.all())
+
+    async def bulk_create(
+        self,
+        objs_in: Sequence[Union[ModelType, Dict[str, Any]]],
+        session: Optional[AsyncSession] = None,
+    ) -> List[int]:
+        rows = to_rows(self.model, objs_in)
+        if not rows:
+            return []
+        async with self._session_scope(session) as session:
+            result = await session.exec(insert_statement(self.model), params=rows)
+            ids = list(result.scalars())
+            await session.commit()
+            return ids
+
+    async def bulk_update(
+        self, objs_in: Sequence[Dict[str, Any]], session: Optional[AsyncSession] = None
+    ) -> List[int]:
+        if not objs_in:
+            return []
+        ids = [obj["id"] for obj in objs_in]
+        async with self._session_scope(session) as session:
+            statement = select(self.model.id).where(self.model.id.in_(ids))  # type: ignore
+            existing = set((await session.exec(statement)).all())
+            rows = [obj for obj in objs_in if obj["id"] in existing]
+            if rows:
+                await session.exec(update(self.model), params=rows)  # type: ignore
+                await session.commit()
+                # 批量更新不逐行失效, 直接清空缓存
+                self._cache_clear()
+            return [i for i in ids if i not in existing]
+
+    async def upsert_many(
+        self,
+        objs_in: Sequence[Union[ModelType, Dict[str, Any]]],
+        conflict_fields: Sequence[str],
+        session: Optional[AsyncSession] = None,
+    ) -> int:
+        rows = to_rows(self.model, objs_in)
+        if not rows:
+            return 0
+        skip_fields = {*conflict_fields, *self.cursor_fields}
+        update_fields = [f for f in rows[0] if f not in skip_fields]
+        statement = upsert_statement(
+            self.model, self.engine.dialect.name, conflict_fields, update_fields
+        )
+        async with self._session_scope(session) as session:
+            await session.exec(statement, params=rows)  # type: ignore
+            await session.commit()
+            self._cache_clear()
+            return len(rows)
+
+    async def ensure_indexes(self) -> List[str]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(ensure_indexes, self.model, self.lookup_fields)
+
+    async def explain(
+        self, conditions: Dict[str, Any], session: Optional[AsyncSession] = None
+    ) -> List[str]:
+        check_lookup(self.model, conditions, self.lookup_fields, strict=False)
+        sql = explain_sql(
+            conditions_statement(self.model, conditions), self.engine.dialect
+        )
+        if sql is None:
+            raise ValueError(f"explain is not supported for {self.engine.dialect.name}")
+        async with self._session_scope(session) as session:
+            rows = (await session.exec(text(sql))).all()  # type: ignore
+            return [str(row[-1]) for row in rows]
+
+
+async_user_dao: AsyncBaseDao[User]
+
+
+@lru_cache(maxsize=None)
+def get_async_user_dao() -> AsyncBaseDao[User]:
+    # 与 base_dao.user_dao 一样在第一次访问时创建, 共享同一份用户缓存
+    return AsyncBaseDao[User](
+        User, cache=get_user_cache(), lookup_fields=USER_LOOKUP_FIELDS
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name == "async_user_dao":
+        return get_async_user_dao()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
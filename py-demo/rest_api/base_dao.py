@@ -1,8 +1,34 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
-from settings import db_config
-from sqlalchemy import create_engine, select
-from sqlmodel import Session, SQLModel
+import settings
+from bulk import insert_statement, to_rows, upsert_statement
+from cache import DaoCache, LRUCache
+from db import get_engine
+from lookup import (
+    check_lookup,
+    conditions_statement,
+    declared_indexed_fields,
+    ensure_indexes,
+    explain_sql,
+)
+from pagination import DEFAULT_PAGE_SIZE, clamp_page_size, keyset_statement, split_page
+from projection import projection_fields, rows_to_items
+from sqlalchemy import Engine, text, update
+from sqlmodel import Session, SQLModel, select
 from user_model import User
 
 # 泛型类型
@@ -11,77 +37,303 @@ ModelType = TypeVar("ModelType", bound=SQLModel)
 
 class BaseDao(Generic[ModelType]):
 
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        engine: Optional[Engine] = None,
+        cursor_fields: Sequence[str] = ("created_at", "id"),
+        cache: Optional[DaoCache[ModelType]] = None,
+        lookup_fields: Optional[Sequence[str]] = None,
+        strict_lookup: bool = True,
+    ):
         self.model = model
-        database_url = f"postgresql://{db_config.username}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.database}"
-        self.engine = create_engine(database_url)
+        # 默认使用进程共享的 engine, 避免每个 DAO 各自创建连接池
+        self.engine = engine or get_engine()
+        # keyset 分页的排序字段, 最后一个字段需唯一 (如主键)
+        self.cursor_fields = tuple(cursor_fields)
+        # 可选的读缓存, 按主键和唯一字段缓存
+        self.cache = cache
+        # 允许作为查询条件的字段 (需有索引), 默认为模型上声明了索引的字段
+        self.lookup_fields = tuple(
+            lookup_fields or sorted(declared_indexed_fields(model))
+        )
+        # strict: 拒绝会全表扫描的查询, 否则只打印告警
+        self.strict_lookup = strict_lookup
 
-    def create(self, obj_in: ModelType) -> ModelType:
-        with Session(self.engine) as session:
+    def _cache_load(self, field: str, value: Any) -> Optional[ModelType]:
+        if self.cache is None or not self.cache.is_key_field(field):
+            return None
+        return self.cache.load(field, value)
+
+    def _cache_store(self, obj: Optional[ModelType]):
+        if self.cache is not None and obj is not None:
+            self.cache.store(obj)
+
+    def _cache_keys(self, obj: ModelType) -> Optional[Dict[str, Any]]:
+        return self.cache.key_values(obj) if self.cache is not None else None
+
+    def _cache_evict(self, keys: Optional[Dict[str, Any]]):
+        if self.cache is not None and keys is not None:
+            self.cache.evict(keys)
+
+    def _cache_clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    @contextmanager
+    def _session_scope(self, session: Optional[Session]) -> Iterator[Session]:
+        # 优先使用调用方 (如请求级依赖) 传入的 session, 否则临时创建一个
+        if session is not None:
+            yield session
+            return
+        with Session(self.engine) as new_session:
+            yield new_session
+
+    def create(self, obj_in: ModelType, session: Optional[Session] = None) -> ModelType:
+        with self._session_scope(session) as session:
             db_obj = self.model.model_validate(obj_in)
             session.add(db_obj)
             session.commit()
             session.refresh(db_obj)
             return db_obj
 
-    def get_by_id(self, user_id: int) -> Optional[ModelType]:
-        with Session(self.engine) as session:
+    def get_by_id(
+        self, user_id: int, session: Optional[Session] = None
+    ) -> Optional[ModelType]:
+        cached = self._cache_load("id", user_id)
+        if cached is not None:
+            return cached
+        with self._session_scope(session) as session:
             statement = select(self.model).where(self.model.id == user_id)  # type: ignore
             result = session.exec(statement).first()  # type: ignore
+            self._cache_store(result)
             return result
 
-    def get_all(self) -> List[ModelType]:
-        with Session(self.engine) as session:
+    def get_all(self, session: Optional[Session] = None) -> List[ModelType]:
+        with self._session_scope(session) as session:
             statement = select(self.model)
             result = session.exec(statement).all()  # type: ignore
             return result
 
-    def update(self, user_id: int, obj_in: Dict[str, Any]) -> Optional[ModelType]:
-        with Session(self.engine) as session:
+    def update(
+        self, user_id: int, obj_in: Dict[str, Any], session: Optional[Session] = None
+    ) -> Optional[ModelType]:
+        with self._session_scope(session) as session:
             statement = select(self.model).where(self.model.id == user_id)  # type: ignore
             db_obj = session.exec(statement).first()  # type: ignore
 
             if db_obj:
+                # 提交成功后按旧的键值失效: 提交前失效时, 并发的读取会把旧行重新写入缓存
+                old_keys = self._cache_keys(db_obj)
                 for key, value in obj_in.items():
                     if hasattr(db_obj, key):
                         setattr(db_obj, key, value)
                 session.add(db_obj)
                 session.commit()
+                self._cache_evict(old_keys)
                 session.refresh(db_obj)
             return db_obj
 
-    def delete(self, user_id: int) -> bool:
-        with Session(self.engine) as session:
-            statement = select(self.model).where(self.model.row_id == user_id)  # type: ignore
+    def delete(self, user_id: int, session: Optional[Session] = None) -> bool:
+        with self._session_scope(session) as session:
+            statement = select(self.model).where(self.model.id == user_id)  # type: ignore
             db_obj = session.exec(statement).first()  # type: ignore
             if not db_obj:
                 return False
 
+            old_keys = self._cache_keys(db_obj)
             session.delete(db_obj)
             session.commit()
+            self._cache_evict(old_keys)
             return True
 
-    def get_by_field(self, field_name: str, value: Any) -> Optional[ModelType]:
-        with Session(self.engine) as session:
+    def get_by_field(
+        self, field_name: str, value: Any, session: Optional[Session] = None
+    ) -> Optional[ModelType]:
+        check_lookup(self.model, [field_name], self.lookup_fields, self.strict_lookup)
+        cached = self._cache_load(field_name, value)
+        if cached is not None:
+            return cached
+        with self._session_scope(session) as session:
             statement = select(self.model).where(
                 getattr(self.model, field_name) == value
             )
             result = session.exec(statement).first()  # type: ignore
+            if self.cache is not None and self.cache.is_key_field(field_name):
+                self._cache_store(result)
             return result
 
-    def get_page(self, skip: int = 0, limit: int = 20) -> List[ModelType]:
-        with Session(self.engine) as session:
-            statement = select(self.model).offset(skip).limit(limit)
-            result = session.exec(statement).all()  # type: ignore
-            return result
+    def get_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        session: Optional[Session] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Return one page and the cursor of the next page (None on the last page)."""
+        limit = clamp_page_size(limit)
+        statement = keyset_statement(self.model, self.cursor_fields, cursor, limit)
+        with self._session_scope(session) as session:
+            rows = session.exec(statement).all()  # type: ignore
+            return split_page(rows, self.cursor_fields, limit)
 
-    def get_by_conditions(self, conditions: Dict[str, Any]) -> List[ModelType]:
-        with Session(self.engine) as session:
-            statement = select(self.model)
-            for field, value in conditions.items():
-                statement = statement.where(getattr(self.model, field) == value)
+    def get_page_fields(
+        self,
+        fields: Sequence[str],
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        as_dict: bool = True,
+        session: Optional[Session] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Like get_page, but select only the named fields and return dicts or tuples."""
+        # 排序字段需要查出来用于生成游标, 但不返回给调用方
+        select_fields = projection_fields(self.model, fields, self.cursor_fields)
+        limit = clamp_page_size(limit)
+        statement = keyset_statement(
+            self.model, self.cursor_fields, cursor, limit, select_fields
+        )
+        with self._session_scope(session) as session:
+            rows = session.exec(statement).all()  # type: ignore
+        items, next_cursor = split_page(rows, self.cursor_fields, limit)
+        return rows_to_items(items, fields, as_dict), next_cursor
+
+    def stream_fields(
+        self,
+        fields: Sequence[str],
+        conditions: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        session: Optional[Session] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the named fields of all rows matching conditions in batches of dicts.
+        Uses a server-side cursor (yield_per), so memory stays flat for any table size.
+        """
+        # 无条件时为全表导出, 有条件时同样要求命中 lookup field
+        if conditions:
+            check_lookup(self.model, conditions, self.lookup_fields, self.strict_lookup)
+        select_fields = projection_fields(self.model, fields)
+        statement = conditions_statement(
+            self.model, conditions or {}, select_fields
+        ).execution_options(yield_per=batch_size)
+        with self._session_scope(session) as session:
+            result = session.exec(statement)  # type: ignore
+            for rows in result.mappings().partitions():
+                yield [dict(row) for row in rows]
+
+    def get_by_conditions(
+        self, conditions: Dict[str, Any], session: Optional[Session] = None
+    ) -> List[ModelType]:
+        check_lookup(self.model, conditions, self.lookup_fields, self.strict_lookup)
+        statement = conditions_statement(self.model, conditions)
+        with self._session_scope(session) as session:
             result = session.exec(statement).all()  # type: ignore
             return result
 
+    def bulk_create(
+        self,
+        objs_in: Sequence[Union[ModelType, Dict[str, Any]]],
+        session: Optional[Session] = None,
+    ) -> List[int]:
+        """Insert all rows with one executemany and one commit, return the new ids."""
+        rows = to_rows(self.model, objs_in)
+        if not rows:
+            return []
+        with self._session_scope(session) as session:
+            ids = session.exec(insert_statement(self.model), params=rows).scalars()
+            ids = list(ids)
+            session.commit()
+            return ids
+
+    def bulk_update(
+        self, objs_in: Sequence[Dict[str, Any]], session: Optional[Session] = None
+    ) -> List[int]:
+        """Update rows by primary key ("id" in each dict), return the ids not found."""
+        if not objs_in:
+            return []
+        ids = [obj["id"] for obj in objs_in]
+        with self._session_scope(session) as session:
+            statement = select(self.model.id).where(self.model.id.in_(ids))  # type: ignore
+            existing = set(session.exec(statement).all())
+            rows = [obj for obj in objs_in if obj["id"] in existing]
+            if rows:
+                # ORM bulk UPDATE by primary key: 按 id 分组执行 executemany
+                session.exec(update(self.model), params=rows)  # type: ignore
+                session.commit()
+                # 批量更新不逐行失效, 直接清空缓存
+                self._cache_clear()
+            return [i for i in ids if i not in existing]
+
+    def upsert_many(
+        self,
+        objs_in: Sequence[Union[ModelType, Dict[str, Any]]],
+        conflict_fields: Sequence[str],
+        session: Optional[Session] = None,
+    ) -> int:
+        """INSERT ... ON CONFLICT DO UPDATE, rows matching conflict_fields are updated."""
+        rows = to_rows(self.model, objs_in)
+        if not rows:
+            return 0
+        # 排序字段 (created_at, id) 不更新, 保证 keyset 分页顺序稳定
+        skip_fields = {*conflict_fields, *self.cursor_fields}
+        update_fields = [f for f in rows[0] if f not in skip_fields]
+        statement = upsert_statement(
+            self.model, self.engine.dialect.name, conflict_fields, update_fields
+        )
+        with self._session_scope(session) as session:
+            session.exec(statement, params=rows)  # type: ignore
+            session.commit()
+            self._cache_clear()
+            return len(rows)
+
+    def ensure_indexes(self) -> List[str]:
+        """Create missing declared and lookup field indexes, run once at startup."""
+        with self.engine.begin() as conn:
+            return ensure_indexes(conn, self.model, self.lookup_fields)
+
+    def explain(
+        self, conditions: Dict[str, Any], session: Optional[Session] = None
+    ) -> List[str]:
+        """Return the query plan of get_by_conditions(conditions), one line per row."""
+        check_lookup(self.model, conditions, self.lookup_fields, strict=False)
+        sql = explain_sql(
+            conditions_statement(self.model, conditions), self.engine.dialect
+        )
+        if sql is None:
+            raise ValueError(f"explain is not supported for {self.engine.dialect.name}")
+        with self._session_scope(session) as session:
+            rows = session.exec(text(sql)).all()  # type: ignore
+            return [str(row[-1]) for row in rows]
+
+
+USER_LOOKUP_FIELDS = ("id", "username", "email")
+
+user_cache: Optional[DaoCache[User]]
+user_dao: BaseDao[User]
+
+
+# user_cache / user_dao 在第一次访问时创建, 导入本模块不读取配置也不创建 engine
+
+
+@lru_cache(maxsize=None)
+def get_user_cache() -> Optional[DaoCache[User]]:
+    # 同步和异步 DAO 共享同一份用户缓存
+    cache_config = settings.cache_config
+    if not cache_config.enabled:
+        return None
+    return DaoCache[User](
+        User,
+        LRUCache(maxsize=cache_config.maxsize, ttl=cache_config.ttl),
+        key_fields=USER_LOOKUP_FIELDS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_user_dao() -> BaseDao[User]:
+    return BaseDao[User](User, cache=get_user_cache(), lookup_fields=USER_LOOKUP_FIELDS)
+
 
-user_dao = BaseDao[User](User)
+def __getattr__(name: str) -> Any:
+    if name == "user_cache":
+        return get_user_cache()
+    if name == "user_dao":
+        return get_user_dao()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,51 @@
+from typing import Any, Dict, List, Sequence, Type, Union
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+from sqlmodel import SQLModel
+
+BULK_BATCH_SIZE = 1000
+
+# 批量写入: 一条 INSERT/UPDATE 语句 + 多组参数 (executemany), 每批只提交一次
+
+
+def to_rows(
+    model: Type[SQLModel], objs_in: Sequence[Union[SQLModel, Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Validate input objects and dump them to column dicts, with defaults filled in."""
+    rows = []
+    for obj in objs_in:
+        row = model.model_validate(obj).model_dump()
+        if row.get("id") is None:
+            row.pop("id", None)
+        rows.append(row)
+    return rows
+
+
+def insert_statement(model: Type[SQLModel]) -> Insert:
+    # sort_by_parameter_order: 返回的 id 与传入参数顺序一致
+    return insert(model).returning(
+        model.id, sort_by_parameter_order=True  # type: ignore
+    )
+
+
+def upsert_statement(
+    model: Type[SQLModel],
+    dialect_name: str,
+    conflict_fields: Sequence[str],
+    update_fields: Sequence[str],
+) -> Insert:
+    """INSERT ... ON CONFLICT (conflict_fields) DO UPDATE, for postgres and sqlite."""
+    match dialect_name:
+        case "postgresql":
+            statement = postgresql.insert(model)
+        case "sqlite":
+            statement = sqlite.insert(model)
+        case _:
+            raise ValueError(f"upsert is not supported for dialect: {dialect_name}")
+
+    return statement.on_conflict_do_update(
+        index_elements=list(conflict_fields),
+        set_={f: statement.excluded[f] for f in update_fields},
+    )
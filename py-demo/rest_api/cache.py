@@ -0,0 +1,172 @@
+import dataclasses
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Sequence, Tuple, Type, TypeVar, Union
+
+from sqlmodel import SQLModel
+
+ModelType = TypeVar("ModelType", bound=SQLModel)
+
+# 读缓存: 按主键和唯一字段缓存行数据 (dict), 更新/删除时失效
+
+
+@dataclasses.dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+
+class CacheBackend(ABC):
+    """Key-value store used by DaoCache, values are json-compatible dicts."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]): ...
+
+    @abstractmethod
+    def delete(self, *keys: str): ...
+
+    @abstractmethod
+    def clear(self): ...
+
+    def size(self) -> int:
+        return -1
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with a per-entry TTL, thread safe."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expire_at, value = entry
+            if expire_at < time.monotonic():
+                del self._data[key]
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend on a redis-py compatible client (get/set/delete/scan_iter),
+    e.g. redis.Redis or a local stand-in such as fakeredis.
+    """
+
+    def __init__(self, client: Any, prefix: str = "dao:", ttl: float = 60.0):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        # 淘汰由 redis 的 maxmemory-policy 负责, 这里只设置过期时间
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class DaoCache(Generic[ModelType]):
+    """Caches model rows by primary key and by unique fields."""
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        backend: CacheBackend,
+        key_fields: Sequence[str] = ("id",),
+    ):
+        self.model = model
+        self.backend = backend
+        self.key_fields = tuple(key_fields)
+        self.namespace = getattr(model, "__tablename__", model.__name__)
+
+    def _key(self, field: str, value: Any) -> str:
+        return f"{self.namespace}:{field}:{value}"
+
+    def is_key_field(self, field: str) -> bool:
+        return field in self.key_fields
+
+    def load(self, field: str, value: Any) -> Optional[ModelType]:
+        row = self.backend.get(self._key(field, value))
+        if row is None:
+            return None
+        return self.model.model_validate(row)
+
+    def store(self, obj: ModelType):
+        row = obj.model_dump(mode="json")
+        for field in self.key_fields:
+            self.backend.set(self._key(field, row[field]), row)
+
+    def key_values(self, obj: ModelType) -> Dict[str, Any]:
+        return {f: getattr(obj, f) for f in self.key_fields}
+
+    def evict(self, obj: Union[ModelType, Dict[str, Any]]):
+        # 传入 key_values 记录的旧值时, 唯一字段被修改后旧键也会失效
+        values = obj if isinstance(obj, dict) else self.key_values(obj)
+        self.backend.delete(*(self._key(f, v) for f, v in values.items()))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**dataclasses.asdict(self.backend.stats), "size": self.backend.size()}
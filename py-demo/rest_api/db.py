@@ -0,0 +1,93 @@
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import settings
+from settings import DatabaseSettings
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# 进程级 engine 注册表: 相同 url 只创建一个 engine (一个连接池)
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_kwargs(config: DatabaseSettings, url: str) -> Dict[str, Any]:
+    if url.startswith("sqlite") and ":memory:" in url:
+        # 内存 sqlite 只能共享一个连接, 不支持连接池参数
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return {
+        "connect_args": connect_args,
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.pool_timeout,
+        "pool_recycle": config.pool_recycle,
+        "pool_pre_ping": config.pool_pre_ping,
+    }
+
+
+def get_engine(config: Optional[DatabaseSettings] = None) -> Engine:
+    config = config or settings.db_config
+    url = config.database_url
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url, **_engine_kwargs(config, url))
+            _engines[url] = engine
+        return engine
+
+
+def get_async_engine(config: Optional[DatabaseSettings] = None) -> AsyncEngine:
+    config = config or settings.db_config
+    url = config.async_database_url
+    engine = _async_engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _async_engines.get(url)
+        if engine is None:
+            engine = create_async_engine(url, **_engine_kwargs(config, url))
+            _async_engines[url] = engine
+        return engine
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+async def dispose_async_engines():
+    with _engines_lock:
+        engines = list(_async_engines.values())
+        _async_engines.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def get_session() -> Iterator[Session]:
+    """FastAPI dependency: one session per request, closed when the request ends."""
+    with Session(get_engine()) as session:
+        yield session
+
+
+def new_async_session() -> AsyncSession:
+    # expire_on_commit=False: commit 后返回的对象仍可读取, 不会触发隐式 IO
+    return AsyncSession(get_async_engine(), expire_on_commit=False)
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Async version of get_session for `async def` handlers."""
+    async with new_async_session() as session:
+        yield session
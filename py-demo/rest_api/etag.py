@@ -0,0 +1,40 @@
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response
+
+# 条件请求: ETag 由行版本 (id, updated_at) 计算, 不需要先序列化响应体.
+# 使用弱 ETag, 压缩前后的响应可以共用同一个 ETag.
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against etag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = _opaque_tag(etag)
+    return any(_opaque_tag(t.strip()) == tag for t in if_none_match.split(","))
+
+
+def items_etag(items: Iterable[Dict[str, Any]], *extra: Any) -> str:
+    """ETag of a list response, from the (id, updated_at) of each item."""
+    return make_etag(*extra, *((item["id"], item["updated_at"]) for item in items))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
@@ -0,0 +1,151 @@
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Type
+
+from sqlalchemy import Connection, Index, inspect
+from sqlalchemy import select as sa_select
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql import Select
+from sqlmodel import SQLModel, select
+
+logger = logging.getLogger(__name__)
+
+# 查询字段检查: DAO 声明可查询字段 (lookup fields), 每个字段都要有索引 (作为索引首列),
+# 不含任何 lookup field 的过滤条件会导致全表扫描, 默认直接拒绝
+
+
+class FullScanError(ValueError):
+    """Raised when a filter has no indexed lookup field and would scan the whole table."""
+
+
+def model_columns(model: Type[SQLModel]) -> Dict[str, Any]:
+    return {c.name: c for c in model.__table__.columns}  # type: ignore
+
+
+def column_python_type(column: Any) -> type:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        # 如 sqlmodel 的 AutoString 未实现 python_type
+        return str
+
+
+def declared_indexed_fields(model: Type[SQLModel]) -> Set[str]:
+    """Fields that lead an index declared on the model (pk, unique, index=True, Index)."""
+    table = model.__table__  # type: ignore
+    fields = {c.name for c in table.primary_key.columns}
+    fields |= {c.name for c in table.columns if c.unique or c.index}
+    fields |= {list(idx.columns)[0].name for idx in table.indexes}
+    return fields
+
+
+def check_lookup(
+    model: Type[SQLModel],
+    fields: Iterable[str],
+    lookup_fields: Sequence[str],
+    strict: bool = True,
+):
+    fields = list(fields)
+    columns = model_columns(model)
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError(f"unknown fields for {model.__name__}: {unknown}")
+
+    if any(f in lookup_fields for f in fields):
+        return
+    msg = (
+        f"filter on {fields} has no lookup field of {model.__name__} "
+        f"{list(lookup_fields)} and would scan the whole table"
+    )
+    if strict:
+        raise FullScanError(msg)
+    logger.warning(msg)
+
+
+def coerce_conditions(model: Type[SQLModel], raw: Mapping[str, str]) -> Dict[str, Any]:
+    """Convert string values (e.g. query params) to the python type of each column."""
+    columns = model_columns(model)
+    conditions = {}
+    for field, value in raw.items():
+        if field not in columns:
+            raise ValueError(f"unknown field for {model.__name__}: {field}")
+        python_type = column_python_type(columns[field])
+        try:
+            if python_type is bool:
+                conditions[field] = value.lower() in ("1", "true", "yes")
+            elif python_type in (datetime, date):
+                # datetime("2024-01-01") 会抛出 TypeError, 按 ISO 8601 解析
+                conditions[field] = python_type.fromisoformat(value)
+            else:
+                conditions[field] = python_type(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"invalid value for {field}: {value!r}") from e
+    return conditions
+
+
+def conditions_statement(
+    model: Type[SQLModel],
+    conditions: Mapping[str, Any],
+    select_fields: Optional[Sequence[str]] = None,
+) -> Select:
+    if select_fields:
+        # 用 sqlalchemy 的 select, 单列时也返回 Row 而不是标量
+        statement = sa_select(*(getattr(model, f) for f in select_fields))
+    else:
+        statement = select(model)
+    for field, value in conditions.items():
+        statement = statement.where(getattr(model, field) == value)
+    return statement  # type: ignore
+
+
+def ensure_indexes(
+    conn: Connection, model: Type[SQLModel], lookup_fields: Sequence[str]
+) -> List[str]:
+    """
+    Migration step run at startup: create the indexes declared on the model that are
+    missing from the table, and an index for each lookup field that is not the leading
+    column of an existing index. Returns the created index names.
+    """
+    table = model.__table__  # type: ignore
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        return []
+
+    created = []
+    existing = inspector.get_indexes(table.name)
+    # create_all 不会给已存在的表补建索引, 如 keyset 分页的 (created_at, id) 联合索引
+    existing_names = {idx["name"] for idx in existing}
+    for index in table.indexes:
+        if index.name not in existing_names:
+            index.create(bind=conn, checkfirst=True)
+            logger.info("created declared index %s", index.name)
+            created.append(str(index.name))
+            existing.append({"column_names": [c.name for c in index.columns]})
+
+    covered = set(inspector.get_pk_constraint(table.name)["constrained_columns"][:1])
+    for idx in existing:
+        covered.update(idx["column_names"][:1])
+    for uc in inspector.get_unique_constraints(table.name):
+        covered.update(uc["column_names"][:1])
+
+    for field in lookup_fields:
+        if field in covered:
+            continue
+        index = Index(f"ix_{table.name}_{field}", table.c[field])
+        index.create(bind=conn, checkfirst=True)
+        logger.info("created index %s for lookup field %s", index.name, field)
+        created.append(str(index.name))
+    return created
+
+
+def explain_sql(statement: Select, dialect: Dialect) -> Optional[str]:
+    compiled = statement.compile(
+        dialect=dialect, compile_kwargs={"literal_binds": True}
+    )
+    match dialect.name:
+        case "postgresql":
+            return f"EXPLAIN {compiled}"
+        case "sqlite":
+            return f"EXPLAIN QUERY PLAN {compiled}"
+        case _:
+            return None
@@ -1,31 +1,55 @@
-from fastapi import FastAPI
-from settings import db_config
-from sqlmodel import SQLModel, create_engine
-from user_api import router as user_router
+import argparse
+import os
+import sys
 
-database_url = f"postgresql://{db_config.username}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.database}"
-engine = create_engine(database_url)
+# py-demo 根目录加入 sys.path, 以导入公共模块 common/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from common.server import add_server_args, run_server
+from common.startup import add_profile_args, profile_startup
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(
-        engine,
-    )
-
+# 启动入口只依赖标准库和 common/, FastAPI/SQLModel 和 DB 配置在第一次访问 main.app 时才加载
+# (如 uvicorn main:app), 只解析命令行或分析启动耗时不需要 DB 配置.
 
-app = FastAPI(title="users managerment demo")
-app.include_router(user_router)
 
+def __getattr__(name: str):
+    if name == "app":
+        from application import app
 
-@app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main():
-    import uvicorn
-
-    uvicorn.run(app, host="0.0.0.0", port=8081)
+    parser = argparse.ArgumentParser(description="users rest api server")
+    add_server_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup(
+            "main",
+            os.path.dirname(os.path.abspath(__file__)),
+            attrs=("app",),
+            repeat=args.profile_repeat,
+        )
+        return
+
+    from application import app, preload_schema
+
+    from common.logger import setup_stream_logging
+
+    # worker 在 fork 之后各自启动 queue logging, 见 common/server.py
+    setup_stream_logging()
+    run_server(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        graceful_timeout=args.graceful_timeout,
+        reuse_port=args.reuse_port,
+        preload=preload_schema,
+    )
 
 
 if __name__ == "__main__":
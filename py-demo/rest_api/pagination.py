@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from lookup import column_python_type
+from sqlalchemy import select as sa_select
+from sqlalchemy import tuple_
+from sqlmodel import SQLModel, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# keyset 分页: 按 (created_at, id) 排序, 下一页从上一页最后一行之后开始,
+# 不使用 OFFSET, 所以任意一页的查询代价相同
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row into an opaque cursor token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor size mismatch")
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(payload, types)
+        ]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_statement(
+    model: Type[SQLModel],
+    fields: Sequence[str],
+    cursor: Optional[str],
+    limit: int,
+    select_fields: Optional[Sequence[str]] = None,
+) -> SelectOfScalar:
+    """Select the page after cursor, whole rows or only select_fields (must include fields)."""
+    columns = [getattr(model, f) for f in fields]
+    if select_fields:
+        # 用 sqlalchemy 的 select, 单列时也返回 Row 而不是标量
+        statement = sa_select(*(getattr(model, f) for f in select_fields))
+    else:
+        statement = select(model)
+    # 多取一行用于判断是否还有下一页
+    statement = statement.order_by(*columns).limit(limit + 1)
+    if cursor:
+        values = decode_cursor(cursor, [column_python_type(c) for c in columns])
+        statement = statement.where(tuple_(*columns) > tuple_(*values))
+    return statement
+
+
+def split_page(
+    rows: Sequence[Any], fields: Sequence[str], limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor([getattr(last, f) for f in fields])
@@ -0,0 +1,23 @@
+from typing import Any, List, Sequence, Type
+
+from lookup import model_columns
+from sqlmodel import SQLModel
+
+# 列投影: 只查询需要的列, 返回 dict/tuple, 跳过 ORM 对象构建和 pydantic 校验
+
+
+def projection_fields(
+    model: Type[SQLModel], fields: Sequence[str], extra: Sequence[str] = ()
+) -> List[str]:
+    """Validate the requested fields and append the extra (e.g. sort key) fields."""
+    columns = model_columns(model)
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError(f"unknown fields for {model.__name__}: {unknown}")
+    return list(dict.fromkeys([*fields, *extra]))
+
+
+def rows_to_items(rows: Sequence[Any], fields: Sequence[str], as_dict: bool = True):
+    if as_dict:
+        return [{f: row._mapping[f] for f in fields} for row in rows]
+    return [tuple(row._mapping[f] for f in fields) for row in rows]
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,10 +10,96 @@ class DatabaseSettings(BaseSettings):
     username: str = "postgres"
     password: str
     database: str
+    # 完整连接串, 设置后覆盖上面的 host/port 等配置 (如 sqlite:///./test.db)
+    url: Optional[str] = None
+
+    # 连接池配置: 进程内所有 DAO 共享同一个 engine 和连接池
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
 
     class Config:
         env_prefix = "DB_"
 
+    @property
+    def database_url(self) -> str:
+        if self.url:
+            return self.url
+        return f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
+
+    @property
+    def async_database_url(self) -> str:
+        # 异步驱动: postgresql -> asyncpg, sqlite -> aiosqlite
+        url = self.database_url
+        if url.startswith("postgresql://"):
+            return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        if url.startswith("sqlite://"):
+            return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return url
+
+
+class CacheSettings(BaseSettings):
+    enabled: bool = True
+    maxsize: int = 10000
+    # 秒, 多进程部署时其他进程的本地缓存最多脏 ttl 秒
+    ttl: float = 60.0
+
+    class Config:
+        env_prefix = "CACHE_"
+
+
+class AdmissionSettings(BaseSettings):
+    enabled: bool = True
+    # 每个客户端 IP 的令牌桶: 每秒速率, 桶容量
+    client_rate: float = 100.0
+    client_burst: float = 200.0
+    # /users 路由整体的令牌桶
+    route_rate: float = 1000.0
+    route_burst: float = 2000.0
+    # 0 表示使用 DB 连接池容量 (pool_size + max_overflow)
+    max_concurrency: int = 0
+    max_queue: int = 100
+    # 秒, 排队等待超过此时间返回 503
+    queue_timeout: float = 1.0
+
+    class Config:
+        env_prefix = "ADMISSION_"
+
+
+# 获取配置: 第一次访问 settings.db_config 等时才读取环境变量构建 (PEP 562),
+# 只导入本模块不会读取环境变量, 也不会因缺少 DB_PASSWORD 等必填项报错
+
+db_config: DatabaseSettings
+cache_config: CacheSettings
+admission_config: AdmissionSettings
+
+
+@lru_cache(maxsize=None)
+def get_db_config() -> DatabaseSettings:
+    return DatabaseSettings()  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def get_cache_config() -> CacheSettings:
+    return CacheSettings()
+
+
+@lru_cache(maxsize=None)
+def get_admission_config() -> AdmissionSettings:
+    return AdmissionSettings()
+
+
+_FACTORIES: Dict[str, Callable[[], BaseSettings]] = {
+    "db_config": get_db_config,
+    "cache_config": get_cache_config,
+    "admission_config": get_admission_config,
+}
+
 
-# 获取配置
-db_config = DatabaseSettings()  # type: ignore
+def __getattr__(name: str) -> Any:
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
@@ -1,49 +1,295 @@
-from typing import List
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
 
-from base_dao import user_dao
-from fastapi import APIRouter, HTTPException
-from user_model import User, UserCreate, UserUpdate
+import orjson
+from async_dao import async_user_dao
+from bulk import BULK_BATCH_SIZE
+from db import get_async_session, new_async_session
+from etag import etag_matches, items_etag, make_etag, not_modified
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from lookup import check_lookup, coerce_conditions
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from responses import FastJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from user_model import (
+    USER_PUBLIC_FIELDS,
+    User,
+    UserBulkUpdate,
+    UserCreate,
+    UserUpdate,
+)
 
 router = APIRouter(prefix="/users", tags=["users managerment"])
 
 
+def _set_etag(response: Response, etag: str):
+    # no-cache: 客户端可以缓存, 但每次使用前需要用 If-None-Match 重新验证
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _result_line(index: int, status: str, **kwargs) -> str:
+    return json.dumps({"index": index, "status": status, **kwargs}) + "\n"
+
+
+async def _upsert_batch(
+    batch: List[Dict[str, Any]], start: int, session: AsyncSession
+) -> AsyncIterator[str]:
+    try:
+        await async_user_dao.upsert_many(batch, ["username"], session)
+        for i in range(len(batch)):
+            yield _result_line(start + i, "upserted")
+        return
+    except IntegrityError:
+        await session.rollback()
+
+    # ON CONFLICT (username) 不处理其他唯一字段 (如 email) 的冲突, 整批失败时逐行重试
+    for i, row in enumerate(batch):
+        try:
+            await async_user_dao.upsert_many([row], ["username"], session)
+            yield _result_line(start + i, "upserted")
+        except IntegrityError:
+            await session.rollback()
+            yield _result_line(
+                start + i,
+                "conflict",
+                detail="unique field conflict other than username",
+            )
+
+
+async def _bulk_create_results(
+    rows: List[Dict[str, Any]], on_conflict: str
+) -> AsyncIterator[str]:
+    # 响应是流式的, 请求级 session 在此之前可能已关闭, 这里单独创建 session
+    async with new_async_session() as session:
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            batch = rows[start : start + BULK_BATCH_SIZE]
+            if on_conflict == "update":
+                async for line in _upsert_batch(batch, start, session):
+                    yield line
+                continue
+
+            try:
+                ids = await async_user_dao.bulk_create(batch, session)
+                for i, user_id in enumerate(ids):
+                    yield _result_line(start + i, "created", id=user_id)
+                continue
+            except IntegrityError:
+                await session.rollback()
+
+            # 整批插入失败时逐行重试, 定位冲突的行
+            for i, row in enumerate(batch):
+                try:
+                    ids = await async_user_dao.bulk_create([row], session)
+                    yield _result_line(start + i, "created", id=ids[0])
+                except IntegrityError:
+                    await session.rollback()
+                    yield _result_line(
+                        start + i, "error", detail="user is already exist"
+                    )
+
+
+async def _bulk_update_results(rows: List[Dict[str, Any]]) -> AsyncIterator[str]:
+    async with new_async_session() as session:
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            batch = rows[start : start + BULK_BATCH_SIZE]
+            try:
+                missing = set(await async_user_dao.bulk_update(batch, session))
+            except IntegrityError:
+                await session.rollback()
+                for i in range(len(batch)):
+                    yield _result_line(start + i, "error", detail="conflict on update")
+                continue
+
+            for i, row in enumerate(batch):
+                status = "not_found" if row["id"] in missing else "updated"
+                yield _result_line(start + i, status, id=row["id"])
+
+
+# 批量接口: 按批写入, 每行结果以 NDJSON 流式返回
+# curl -X POST "http://localhost:8081/users/bulk?on_conflict=update" -H "Content-Type: application/json" -d '[...]'
+@router.post("/bulk")
+async def bulk_create_users(
+    users: List[UserCreate], on_conflict: Literal["error", "update"] = "error"
+):
+    rows = [u.model_dump() for u in users]
+    return StreamingResponse(
+        _bulk_create_results(rows, on_conflict), media_type="application/x-ndjson"
+    )
+
+
+@router.put("/bulk")
+async def bulk_update_users(users: List[UserBulkUpdate]):
+    rows = [u.model_dump(exclude_unset=True) for u in users]
+    return StreamingResponse(
+        _bulk_update_results(rows), media_type="application/x-ndjson"
+    )
+
+
 @router.post("/", response_model=User)
-def create_user(user: UserCreate):
-    existing_user = user_dao.get_by_field("username", user.username)
+async def create_user(
+    user: UserCreate, session: AsyncSession = Depends(get_async_session)
+):
+    existing_user = await async_user_dao.get_by_field(
+        "username", user.username, session
+    )
     if existing_user:
         raise HTTPException(status_code=400, detail="user is already exist")
 
     db_user = User(**user.model_dump())
-    return user_dao.create(db_user)
+    return await async_user_dao.create(db_user, session)
+
+
+# curl "http://localhost:8081/users/?limit=20&cursor=<next_cursor>&fields=id,username"
+# curl -H 'If-None-Match: W/"<etag>"' "http://localhost:8081/users/"
+@router.get("/", response_class=FastJSONResponse)
+async def get_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(
+        default=None, description="comma separated fields, default all public fields"
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    selected = fields.split(",") if fields else list(USER_PUBLIC_FIELDS)
+    if not set(selected) <= set(USER_PUBLIC_FIELDS):
+        raise HTTPException(status_code=400, detail=f"invalid fields: {fields}")
+
+    # ETag 由每行的 (id, updated_at) 计算, 未选择的这两列额外查询, 返回前去掉
+    extra = [f for f in ("id", "updated_at") if f not in selected]
+
+    # 只查询需要的列, 直接序列化 dict, 不构建 ORM 对象也不走 response_model 校验
+    try:
+        items, next_cursor = await async_user_dao.get_page_fields(
+            selected + extra, cursor, limit, session=session
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    # next_cursor 也参与计算: 最后一页之后插入新行时, 同样的行会带上新的 next_cursor
+    etag = items_etag(items, selected, cursor, limit, next_cursor)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    for item in items:
+        for f in extra:
+            del item[f]
+    response = FastJSONResponse({"items": items, "next_cursor": next_cursor})
+    _set_etag(response, etag)
+    return response
+
+
+async def _export_lines(fmt: str, conditions: Dict[str, Any]) -> AsyncIterator[bytes]:
+    fields = list(USER_PUBLIC_FIELDS)
+    if fmt == "csv":
+        yield (",".join(fields) + "\r\n").encode("utf-8")
 
+    async with new_async_session() as session:
+        async for batch in async_user_dao.stream_fields(
+            fields, conditions, session=session
+        ):
+            # 每批拼成一个 chunk 输出, 减少小块写入
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerows([row[f] for f in fields] for row in batch)
+                yield buf.getvalue().encode("utf-8")
+            else:
+                yield b"".join(orjson.dumps(row) + b"\n" for row in batch)
 
-@router.get("/", response_model=List[User])
-def get_all_users():
-    return user_dao.get_all()
 
+# 流式导出: 服务端游标分批读取, 内存占用与数据量无关. 其余 query 参数作为过滤条件
+# 时间字段按 ISO 8601 解析, 格式错误返回 400; 只有非 lookup field 的条件也返回 400 (全表扫描)
+# curl "http://localhost:8081/users/export?format=csv&is_active=true&username=foo"
+# curl "http://localhost:8081/users/export?username=foo&created_at=2024-01-01T08:30:00"
+@router.get("/export")
+async def export_users(
+    request: Request,
+    fmt: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+):
+    raw = {k: v for k, v in request.query_params.items() if k != "format"}
+    try:
+        conditions = coerce_conditions(User, raw)
+        if conditions:
+            check_lookup(User, conditions, async_user_dao.lookup_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_lines(fmt, conditions),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=users.{fmt}"},
+    )
+
+
+# 诊断接口: 返回按条件查询的执行计划, 检查是否走索引
+# curl "http://localhost:8081/users/explain?username=foo"
+@router.get("/explain")
+async def explain_users_query(
+    request: Request, session: AsyncSession = Depends(get_async_session)
+):
+    try:
+        conditions = coerce_conditions(User, request.query_params)
+        plan = await async_user_dao.explain(conditions, session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"conditions": conditions, "plan": plan}
+
+
+# curl "http://localhost:8081/users/cache/stats"
+@router.get("/cache/stats")
+async def get_cache_stats():
+    cache = async_user_dao.cache
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+# 未变化时返回 304, 不序列化响应体
+# curl -H 'If-None-Match: W/"<etag>"' "http://localhost:8081/users/1"
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: int):
-    user = user_dao.get_by_id(user_id)
+async def get_user(
+    user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    user = await async_user_dao.get_by_id(user_id, session)
     if not user:
         raise HTTPException(status_code=404, detail="user is not exist")
+
+    etag = make_etag(user.id, user.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    _set_etag(response, etag)
     return user
 
 
 @router.put("/{user_id}", response_model=User)
-def update_user(user_id: int, user_update: UserUpdate):
-    user = user_dao.get_by_id(user_id)
+async def update_user(
+    user_id: int,
+    user_update: UserUpdate,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+):
+    user = await async_user_dao.get_by_id(user_id, session)
     if not user:
         raise HTTPException(status_code=404, detail="user is not exist")
 
     # exclude_unset=True: 只更新提供的字段
     update_data = user_update.model_dump(exclude_unset=True)
-    return user_dao.update(user_id, update_data)
+    user = await async_user_dao.update(user_id, update_data, session)
+    if user:
+        _set_etag(response, make_etag(user.id, user.updated_at))
+    return user
 
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int):
-    ok = user_dao.delete(user_id)
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_async_session)):
+    ok = await async_user_dao.delete(user_id, session)
     if not ok:
         raise HTTPException(status_code=404, detail="user is not exist")
     return {"message": "delete user success"}
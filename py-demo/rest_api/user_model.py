@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 # DB Model
@@ -8,6 +9,8 @@ from sqlmodel import Field, SQLModel
 
 class User(SQLModel, table=True):
     __tablename__ = "users"  # type: ignore
+    # keyset 分页 (created_at, id) 使用的联合索引
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(max_length=50, unique=True)
@@ -15,12 +18,27 @@ class User(SQLModel, table=True):
     password: str = Field(max_length=100)
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.now)
+    # 每次 UPDATE 自动刷新, 作为 ETag 的行版本
+    updated_at: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
     class Config:
         # 序列化时排除 password
         exclude = {"password"}
 
 
+# 列表接口返回的字段, 不包含 password
+USER_PUBLIC_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+
+
 # Request Model
 
 
@@ -34,3 +52,7 @@ class UserUpdate(SQLModel):
     username: Optional[str] = None
     email: Optional[str] = None
     is_active: Optional[bool] = None
+
+
+class UserBulkUpdate(UserUpdate):
+    id: int